@@ -49,7 +49,7 @@ def quadrant_fitness(loci, **kwargs):
     It is a minimization problem and the theoretical best score is 0.
 
     :param loci: Successive positions of joints
-    :type loci: tuple[tuple[tuple[float, float]]]
+    :type loci: numpy.ndarray
     :param **kwargs:
     :return: Sum of square distances between tip locus bounding box and a defined
         square.
@@ -58,7 +58,7 @@ def quadrant_fitness(loci, **kwargs):
     
     """
     # Locus of the Joint "pin" must in linkage order
-    tip_locus = list(x[-1] for x in loci)
+    tip_locus = loci[:, -1]
     # We get the bounding box
     curr_bb = pl.bounding_box(tip_locus)
     # Reference bounding box in order (min_y, max_x, max_y, min_x)
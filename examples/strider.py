@@ -5,8 +5,8 @@ The original linkage can be found at
 https://www.diywalkers.com/strider-linkage-plans.html
 """
 
-import matplotlib.pyplot as plt
-import matplotlib.animation as anim
+import os
+
 import numpy as np
 
 import pylinkage as pl
@@ -53,6 +53,8 @@ BOUNDS = (
     (0, 0, 0, 0, 0, 0, 0, 0),
     (8, 2 * np.pi, 7.2, 10.4, 5.6, 2 * np.pi, 10, 7.6)
 )
+# BOUNDS as arrays, for quick checks
+_LOWER_BOUNDS, _UPPER_BOUNDS = np.array(BOUNDS, dtype=float)
 
 # Initial coordinates according to previous dimensions
 INIT_COORD = (
@@ -61,16 +63,60 @@ INIT_COORD = (
 )
 
 
+# Index in the short form of each flat constraint, and its sign.
+# The crank length (flat index 4) is always 1.
+FLAT_INDEX = np.array((0, 1, 0, 1, 0, 2, 3, 2, 3, 4, 5, 4, 5, 6, 7, 6, 7))
+FLAT_SIGN = np.array((1, -1, 1, 1, 0, 1, 1, 1, 1, 1, -1, 1, 1, 1, 1, 1, 1), dtype=float)
+# Preallocated flat dimensions for sym_stride_evaluator
+_FLAT_DIMENSIONS = np.empty(17)
+# Angles and labels of the axes in the polar view of the swarm: dimensions then score
+_POLAR_T = np.linspace(0, 2 * np.pi, len(DIMENSIONS) + 2)[:-1]
+_POLAR_XTICKLABELS = DIM_NAMES + ("score", )
+# Index of the foot whose stride is evaluated (H)
+FOOT = len(INIT_COORD) - 2
+# Points evaluated on a complete crank revolution, and the crank step between them
+_STRIDE_POINTS = 12
+_CRANK_DT = LAP_POINTS / _STRIDE_POINTS
+# Preallocated foot locus for sym_stride_evaluator
+_FOOT_LOCUS = np.empty((_STRIDE_POINTS, 1, 2))
+
+
+def param2dimensions_flat(param=DIMENSIONS, out=None):
+    """Expand dimensions to a flat array, for one or several dimension sets.
+
+    :param param: Short form for dimensions, one set per row for a batch.
+        (Default value = DIMENSIONS)
+    :type param: numpy.ndarray | tuple[float]
+    :param out: Array to write the result in, avoid any allocation.
+        (Default value = None)
+    :type out: numpy.ndarray | None
+
+    :return: Expanded dimensions, of shape (17, ) or (n_sets, 17).
+    :rtype: numpy.ndarray
+    """
+    param = np.asarray(param, dtype=float)
+    if out is None:
+        out = np.empty(param.shape[:-1] + (17, ))
+    # Gather and sign in place, no intermediate array
+    np.take(param, FLAT_INDEX, axis=-1, out=out)
+    out *= FLAT_SIGN
+    out[..., 4] = 1
+    return out
+
+
 def param2dimensions(param=DIMENSIONS, flat=False):
     """Expand dimensions them to fit in strider.set_num_constraints.
 
     Dimensions parameters are written in short form due to symmetry.
 
     :param param: Short form for dimensions (Default value = DIMENSIONS)
-    :param flat: If the output should be a flat list (Default value = False)
+    :param flat: If the output should be a flat array, see param2dimensions_flat.
+        (Default value = False)
 
     :return: Expanded dimensions
     """
+    if flat:
+        return param2dimensions_flat(param)
     out = (
         # Static joints (A and Y)
         (), (),
@@ -85,12 +131,7 @@ def param2dimensions(param=DIMENSIONS, flat=False):
         # H and I
         (param[6], param[7]), (param[6], param[7])
     )
-    if not flat:
-        return out
-    flat_dims = []
-    for constraint in out[2:]:
-        flat_dims.extend(constraint)
-    return tuple(flat_dims)
+    return out
 
 
 def complete_strider(constraints, prev):
@@ -146,6 +187,45 @@ def complete_strider(constraints, prev):
     return strider
 
 
+def in_bounds(dimensions):
+    """Check if the dimensions are strictly positive and below the upper bounds.
+
+    A null dimension would leave the previous constraint of the linkage
+    unchanged, such dimension sets are not evaluated.
+
+    :param dimensions: Dimensions in short form, or one set per row.
+    :type dimensions: tuple[float] | numpy.ndarray
+
+    :return: False if the dimensions are out of bounds.
+    :rtype: bool | numpy.ndarray
+    """
+    dimensions = np.asarray(dimensions)
+    return (
+        (dimensions > _LOWER_BOUNDS) & (dimensions <= _UPPER_BOUNDS)
+    ).all(axis=-1)
+
+
+def knees_buildable(dimensions):
+    """Check if the knees D and E can be built for some crank position.
+
+    The crank (length 1) moves C around A, so the distance between C and B
+    (or B_p) goes from abs(triangle - 1) to triangle + 1. A knee exists only if
+    femur, rockerL and this distance can form a triangle.
+    It is a necessary condition, no simulation is needed to reject a linkage.
+
+    :param dimensions: Dimensions in short form, or one set per row.
+    :type dimensions: tuple[float] | numpy.ndarray
+
+    :return: False if the strider cannot be built.
+    :rtype: bool | numpy.ndarray
+    """
+    triangle, _, femur, rocker = np.asarray(dimensions)[..., :4].T
+    return (
+        (femur + rocker >= np.abs(triangle - 1))
+        & (np.abs(femur - rocker) <= triangle + 1)
+    )
+
+
 def sym_stride_evaluator(linkage, dimensions, initial_positions):
     """Give score to each dimension set for symmetric strider.
 
@@ -159,25 +239,50 @@ def sym_stride_evaluator(linkage, dimensions, initial_positions):
     :return: Score
     :rtype: float
     """
-    linkage.set_completely(param2dimensions(dimensions, flat=True), initial_positions)
-    points = 12
+    if not (in_bounds(dimensions) and knees_buildable(dimensions)):
+        return 0
+    linkage.set_completely(
+        param2dimensions_flat(dimensions, out=_FLAT_DIMENSIONS), initial_positions
+    )
     try:
-        # Complete revolution with 12 points
-        loci = tuple(
-            map(
-                tuple,
-                linkage.step(
-                    iterations=points, dt=LAP_POINTS / points
-                )
-            )
-        )
+        # Complete revolution with 12 points, only the foot is recorded
+        foot_locus = linkage.step_array(dt=_CRANK_DT, out=_FOOT_LOCUS, joints=(FOOT, ))
     except pl.UnbuildableError:
         return 0
-    foot_locus = tuple(x[-2] for x in loci)
-    # Constraints check
-    # Performances evaluation
-    score = max(k[0] for k in foot_locus) - min(k[0] for k in foot_locus)
-    return score
+    # Performances evaluation: horizontal amplitude of the foot.
+    # For 12 values, Python floats are faster than np.ptp
+    foot_x = foot_locus[:, 0, 0].tolist()
+    return max(foot_x) - min(foot_x)
+
+
+def batch_sym_stride_evaluator(linkage, dimensions, initial_positions):
+    """Give a score to each dimension set of a swarm for symmetric strider.
+
+    All the dimension sets are simulated at once, see :meth:`pl.Linkage.step_batch`.
+
+    :param linkage: Input linkage, only its topology is used
+    :type linkage: pylinkage.Linkage
+    :param dimensions: Dimensions, one set per row
+    :type dimensions: numpy.ndarray
+    :param initial_positions: Initial positions
+    :type initial_positions: tuple
+
+    :return: Score of each dimension set
+    :rtype: numpy.ndarray
+    """
+    # Only the linkages passing the quick check are simulated
+    buildable = in_bounds(dimensions) & knees_buildable(dimensions)
+    constraints = param2dimensions_flat(np.asarray(dimensions)[buildable])
+    # Shape (points, sets, 1, 2), single precision is enough for the score
+    foot_loci = linkage.step_batch(
+        constraints, initial_positions, iterations=_STRIDE_POINTS, dt=_CRANK_DT,
+        dtype=np.float32, joints=(FOOT, )
+    )
+    scores = np.zeros(len(buildable))
+    scores[buildable] = np.ptp(foot_loci[:, :, 0, 0], axis=0)
+    # Unbuildable linkages
+    scores[np.isnan(scores)] = 0
+    return scores
 
 
 def history_saver(evaluator, history, linkage, dims, pos):
@@ -196,6 +301,27 @@ def history_saver(evaluator, history, linkage, dims, pos):
     return score
 
 
+def batch_history_saver(evaluator, history, linkage, dims, pos):
+    """
+    Save the history of a vectorized evaluation to a list of arrays.
+
+    The history is filled in the calling process, only the evaluator may run
+    in worker processes. Each evaluation of the swarm adds an array with
+    the score then the dimensions of each agent, np.stack(history) gives an
+    array of shape (iterations, n_agents, 1 + n_dimensions).
+
+    :param evaluator: Evaluation function of a whole swarm
+    :param history: History list
+    :param linkage: Input linkage
+    :param dims: Dimensions, one set per row
+    :param pos: Initial positions
+
+    """
+    scores = evaluator(linkage, dims, pos)
+    history.append(np.column_stack((scores, dims)))
+    return scores
+
+
 def view_swarm_polar(
     linkage,
     dimensions=DIMENSIONS,
@@ -216,49 +342,55 @@ def view_swarm_polar(
     :param n_iterations: NUmber of iterations (Default value = 400)
     :type n_iterations: int
 
-    
+    :return: Best agents found by the swarm, and the animation.
+        Keep a reference to the animation for as long as it should run.
+    :rtype: tuple[list, matplotlib.animation.FuncAnimation]
     """
+    # Only the views need matplotlib, optimizations do not import it
+    import matplotlib.pyplot as plt
+    import matplotlib.animation as anim
+
     history = []
     out = pl.particle_swarm_optimization(
-        lambda *x: history_saver(sym_stride_evaluator, history, *x),
+        lambda *x: batch_history_saver(batch_sym_stride_evaluator, history, *x),
         linkage,
         center=dimensions, n_particles=n_agents, iters=n_iterations,
-        bounds=BOUNDS, dimensions=len(dimensions)
+        bounds=BOUNDS, dimensions=len(dimensions), vectorized=True
     )
 
     fig = plt.figure(f"Swarm in polar graph")
-    fig.suptitle(f"Final best score: {-out[0][0]:.2f}")
-    formatted_history = [
-        history[i:i + n_agents] for i in range(0, len(history), n_agents)
-    ]
+    fig.suptitle(f"Final best score: {out[0][0]:.2f}")
+    # Shape (iterations, n_agents, 1 + len(dimensions))
+    history = np.stack(history)
     artists = []
 
     def init_polar_repr():
         """Set the axis for the polar representation."""
+        if artists:
+            # Already set, by the first draw or a previous save
+            return artists
         ax = fig.add_subplot(111, projection='polar')
         artists.extend(
             ax.plot([], [], lw=.5, animated=False)[0] for _ in range(n_agents)
         )
         ax.set_rmax(7)
-        ax.set_xticks(
-            np.linspace(0, 2 * np.pi, len(dimensions) + 1, endpoint=False),
-            DIM_NAMES + ("score",)
-        )
+        ax.set_xticks(_POLAR_T, _POLAR_XTICKLABELS)
         artists.append(ax.text(1.9 * np.pi, 2, "", animated=True))
         return artists
 
     def repr_polar_swarm(current_swarm):
         """Represent a swarm in a polar graph.
 
-        :param current_swarm: Swarm of agents
+        :param current_swarm: Iteration, and score then dimensions of each agent
 
         """
-        t = np.linspace(0, 2 * np.pi, len(current_swarm[1][0][1]) + 2)[:-1]
-        for line, agent in zip(artists, current_swarm[1]):
-            line.set_data(t, agent[1] + [agent[0]])
+        iteration, agents = current_swarm
+        for line, agent in zip(artists, agents):
+            # Dimensions, then score
+            line.set_data(_POLAR_T, np.roll(agent, -1))
         artists[-1].set_text(
-            f"Best score: {max(x[0] for x in current_swarm[1]):.2f}"
-            f"\nIteration: {current_swarm[0]}"
+            f"Best score: {agents[:, 0].max():.2f}"
+            f"\nIteration: {iteration}"
         )
 
         return artists
@@ -266,11 +398,11 @@ def view_swarm_polar(
     animation = anim.FuncAnimation(
         fig,
         func=repr_polar_swarm,
-        frames=enumerate(formatted_history),
+        frames=enumerate(history),
         init_func=init_polar_repr,
         blit=True,
         interval=400, repeat=True,
-        save_count=(n_iterations - 1) * bool(save_each)
+        cache_frame_data=False
     )
     plt.show()
     if save_each:
@@ -284,14 +416,14 @@ def view_swarm_polar(
                 " set for Strider legged mechanism"
             }
         )
-        animation.save(
-            r"Particle Swarm Optimization of Strider linkage.mp4",
-            writer=writer
-        )
-    # Prevent the garbage-collection of the animation
-    if animation:
-        pass
-    return out
+        # Frames are sent to ffmpeg as they are drawn, none is kept in memory
+        with writer.saving(fig, "Particle Swarm Optimization of Strider linkage.mp4", dpi=100):
+            for artist in artists:
+                artist.set_animated(False)
+            for frame in enumerate(history):
+                repr_polar_swarm(frame)
+                writer.grab_frame()
+    return out, animation
 
 
 def view_swarm_tiled(
@@ -314,37 +446,49 @@ def view_swarm_tiled(
     :param n_iterations: NUmber of iterations (Default value = 400)
     :type n_iterations: int
 
-    
+    :return: Best agents found by the swarm, and the animation.
+        Keep a reference to the animation for as long as it should run.
+    :rtype: tuple[list, matplotlib.animation.FuncAnimation]
     """
+    # Only the views need matplotlib, optimizations do not import it
+    import matplotlib.pyplot as plt
+    import matplotlib.animation as anim
+
     history = []
 
     out = pl.particle_swarm_optimization(
-        lambda *x: history_saver(sym_stride_evaluator, history, *x),
+        lambda *x: batch_history_saver(batch_sym_stride_evaluator, history, *x),
         linkage,
         center=dimensions, n_particles=n_agents, iters=n_iterations,
-        bounds=BOUNDS, dimensions=len(dimensions)
+        bounds=BOUNDS, dimensions=len(dimensions), vectorized=True
     )
 
     fig = plt.figure("Swarm in tiled mode")
     cells = int(np.ceil(np.sqrt(n_agents)))
     axes = fig.subplots(cells, cells)
-    formatted_history = [
-        history[i:i + n_agents] for i in range(0, len(history), n_agents)
-    ]
 
-    animation = anim.FuncAnimation(
-        fig,
-        lambda frame: pl.swarm_tiled_repr(
+    def formatted_history():
+        """Agents in the format of swarm_tiled_repr, built one frame at a time."""
+        for i, frame in enumerate(history):
+            yield i, [(agent[0], agent[1:], out[0].init_positions) for agent in frame]
+
+    def repr_tiled_swarm(frame):
+        """Draw each linkage of the swarm in its own axis."""
+        pl.swarm_tiled_repr(
             linkage=linkage,
             swarm=frame,
             fig=fig,
             axes=axes,
             dimension_func=lambda dim: param2dimensions(dim, flat=True)
-        ),
-        frames=enumerate(formatted_history),
+        )
+
+    animation = anim.FuncAnimation(
+        fig,
+        repr_tiled_swarm,
+        frames=formatted_history(),
         blit=False,
         interval=1000, repeat=False,
-        save_count=(n_iterations - 1) * bool(save_each)
+        cache_frame_data=False
     )
     plt.show(block=not save_each)
     if save_each:
@@ -359,14 +503,12 @@ def view_swarm_tiled(
             }
         )
 
-        animation.save(
-            "Strider linkage - Particle swarm optimization.mp4",
-            writer=writer
-        )
-    # Prevent the garbage-collection of the animation
-    if animation:
-        pass
-    return out
+        # Frames are sent to ffmpeg as they are drawn, none is kept in memory
+        with writer.saving(fig, "Strider linkage - Particle swarm optimization.mp4", dpi=100):
+            for frame in formatted_history():
+                repr_tiled_swarm(frame)
+                writer.grab_frame()
+    return out, animation
 
 
 def swarm_optimizer(
@@ -404,10 +546,12 @@ def swarm_optimizer(
     print("Initial dimensions:", dimensions)
 
     if show == 1:
-        return view_swarm_polar(linkage, dimensions, save_each, n_agents, n_iterations)
+        out, _ = view_swarm_polar(linkage, dimensions, save_each, n_agents, n_iterations)
+        return out
     elif show == 2:
         # Tiled representation of swarm
-        return view_swarm_tiled(linkage, dimensions, save_each, n_agents, n_iterations)
+        out, _ = view_swarm_tiled(linkage, dimensions, save_each, n_agents, n_iterations)
+        return out
 
     if save_each:
         for dim, i in pl.particle_swarm_optimization(
@@ -431,13 +575,15 @@ def swarm_optimizer(
                 f.close()
     else:
         out = pl.particle_swarm_optimization(
-            sym_stride_evaluator,
+            batch_sym_stride_evaluator,
             linkage,
             dimensions,
             n_particles=n_agents,
             bounds=BOUNDS,
             dimensions=len(dimensions),
             iters=n_iterations,
+            n_processes=os.cpu_count(),
+            vectorized=True,
             *args
         )
         return tuple(out)
@@ -453,13 +599,17 @@ def show_optimized(linkage, data, n_show=10, duration=5, symmetric=True):
     :param symmetric: If the input dimensions should be symmetric (Default value = True)
 
     """
+    shown = set()
     for datum in data[:min(len(data), n_show)]:
-        if datum[0] <= 0:
+        dimensions = tuple(datum[1])
+        # Optimizers may return the same linkage several times
+        if datum[0] <= 0 or dimensions in shown:
             continue
+        shown.add(dimensions)
         if symmetric:
-            linkage.set_num_constraints(param2dimensions(datum[1]), flat=False)
+            linkage.set_num_constraints(param2dimensions_flat(dimensions))
         else:
-            linkage.set_num_constraints(datum[1], flat=False)
+            linkage.set_num_constraints(dimensions, flat=False)
         pl.show_linkage(
             linkage, prev=INIT_COORD, title=str(datum[0]), duration=duration
         )
@@ -45,13 +45,28 @@ from .optimization import (
     kinematic_minimization,
     collections,
 )
-from .visualizer import (
-    plot_static_linkage,
-    plot_kinematic_linkage,
-    show_linkage,
-    swarm_tiled_repr,
-)
 # For compatibility only, geometry.dist is deprecated
 from math import dist
 
 __version__ = "0.6.0"
+
+# The visualizer imports matplotlib, it is only loaded on first use
+_VISUALIZER_EXPORTS = (
+    "plot_static_linkage",
+    "plot_kinematic_linkage",
+    "show_linkage",
+    "swarm_tiled_repr",
+)
+
+
+def __getattr__(name):
+    """Import the visualization features when they are first accessed."""
+    if name in _VISUALIZER_EXPORTS:
+        from . import visualizer
+        return getattr(visualizer, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    """Public names, including the visualization features not yet imported."""
+    return sorted(set(globals()) | set(_VISUALIZER_EXPORTS))
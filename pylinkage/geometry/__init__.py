@@ -3,15 +3,23 @@ Basic geometry package.
 """
 
 from .core import (
+    Point,
+    Circle,
     sqr_dist,
+    sqr_dist_batch,
+    pairwise_sqr_dist,
     norm,
     cyl_to_cart,
+    cyl_to_cart_origin,
+    batch_cyl_to_cart,
     get_nearest_point,
 )
 from .secants import (
     circle_intersect,
+    circle_intersect_batch,
     circle_line_intersection,
     circle_line_from_points_intersection,
+    circle_line_from_points_intersection_batch,
     intersection,
 )
 # For compatibility only, geometry.core.dist is deprecated
@@ -1,30 +1,51 @@
 """
 Basic geometry features.
 """
-import sys
-import warnings
 import math
+import warnings
+from typing import NamedTuple
+# Bound once, a module attribute lookup at each call is slower
+from math import cos, hypot, sin
 
+import numpy as np
 
-def dist_builtin(point1, point2):
-    """Euclidian distance between two 2D points.
 
-    Legacy built-in unoptimized equivalent of `math.dist` in Python 3.8.
-
-    :param tuple[float, float] point1: First point
-    :param tuple[float, float] point2: Second point
+def __getattr__(name):
+    """Deprecated module attributes (PEP 562).
 
+    :param str name: Name of the attribute.
     """
-    return math.sqrt(
-        (point1[0] - point2[0]) ** 2 + (point1[1] - point2[1]) ** 2
-    )
+    if name == "dist":
+        warnings.warn(
+            "geometry.core.dist is deprecated, use math.dist instead.",
+            DeprecationWarning,
+            stacklevel=2
+        )
+        return math.dist
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class Point(NamedTuple):
+    """A 2D point.
+
+    Geometry functions accept any (abscissa, ordinate) sequence,
+    a Point only gives names to the coordinates.
+    As a tuple, it has no per-instance dictionary.
+    """
+
+    x: float
+    y: float
+
 
+class Circle(NamedTuple):
+    """A circle, as (abscissa, ordinate, radius).
+
+    It can be passed anywhere a circle tuple is expected.
+    """
 
-if sys.version_info >= (3, 8, 0):
-    dist = math.dist
-else:
-    warnings.warn('Unable to import dist from math. Using built-in function.')
-    dist = dist_builtin
+    x: float
+    y: float
+    r: float
 
 
 def sqr_dist(point1, point2):
@@ -38,7 +59,63 @@ def sqr_dist(point1, point2):
 
     :return float: Computed distance
     """
-    return (point1[0] - point2[0]) ** 2 + (point1[1] - point2[1]) ** 2
+    x_1, y_1 = point1
+    x_2, y_2 = point2
+    dist_x, dist_y = x_1 - x_2, y_1 - y_2
+    return dist_x * dist_x + dist_y * dist_y
+
+
+def sqr_dist_batch(points1, points2, out=None):
+    """
+    Square of the distance between points of the same index, for many points.
+
+    :param points1: First points, shape (n, 2).
+    :type points1: numpy.ndarray
+    :param points2: Second points, shape (n, 2).
+    :type points2: numpy.ndarray
+    :param out: Preallocated array of shape (n, ) for the result. (Default value = None)
+    :type out: numpy.ndarray | None
+
+    :returns: Squared distances, shape (n, ).
+    :rtype: numpy.ndarray
+    """
+    points1 = np.asarray(points1, dtype=float)
+    points2 = np.asarray(points2, dtype=float)
+    dist_x = points1[..., 0] - points2[..., 0]
+    dist_y = points1[..., 1] - points2[..., 1]
+    # In place, no temporary array for the squares
+    dist_x *= dist_x
+    dist_y *= dist_y
+    return np.add(dist_x, dist_y, out=out)
+
+
+def pairwise_sqr_dist(points1, points2):
+    """
+    Square of the distance between each pair of points of two sets.
+
+    Computed as |a|² + |b|² - 2 a.b, where a matrix product does most of the work.
+    Cancellation makes the result less precise than sqr_dist for points much
+    closer to each other than to the origin.
+
+    :param points1: First points, shape (n, 2).
+    :type points1: numpy.ndarray
+    :param points2: Second points, shape (m, 2).
+    :type points2: numpy.ndarray
+
+    :returns: Squared distances, shape (n, m).
+    :rtype: numpy.ndarray
+    """
+    points1 = np.asarray(points1, dtype=float)
+    points2 = np.asarray(points2, dtype=float)
+    # Squared norms without temporary arrays
+    sqr_norms1 = np.einsum("ij,ij->i", points1, points1)
+    sqr_norms2 = np.einsum("ij,ij->i", points2, points2)
+    distances = points1 @ points2.T
+    distances *= -2
+    distances += sqr_norms1[:, np.newaxis]
+    distances += sqr_norms2
+    # Rounding errors may give slightly negative values
+    return np.maximum(distances, 0, out=distances)
 
 
 def get_nearest_point(reference_point, first_point, second_point):
@@ -52,7 +129,12 @@ def get_nearest_point(reference_point, first_point, second_point):
     """
     if reference_point == first_point or reference_point == second_point:
         return reference_point
-    if sqr_dist(reference_point, first_point) < sqr_dist(reference_point, second_point):
+    # Same computations as sqr_dist, inlined
+    x_0, y_0 = reference_point
+    dist_x, dist_y = x_0 - first_point[0], y_0 - first_point[1]
+    first_dist = dist_x * dist_x + dist_y * dist_y
+    dist_x, dist_y = x_0 - second_point[0], y_0 - second_point[1]
+    if first_dist < dist_x * dist_x + dist_y * dist_y:
         return first_point
     return second_point
 
@@ -63,18 +145,60 @@ def norm(vec):
 
     :param tuple[float, float] vec: Vector to get norm from
     """
-    return math.sqrt(vec[0] ** 2 + vec[1] ** 2)
+    return hypot(vec[0], vec[1])
+
+
+def cyl_to_cart_origin(radius, theta):
+    """Convert polar coordinates around (0, 0) into cartesian.
+
+    Faster than cyl_to_cart when there is no origin to add.
+
+    :param radius: distance from (0, 0)
+    :param theta: angle is the angle starting from abscissa axis
+    """
+    return radius * cos(theta), radius * sin(theta)
+
+
+# Default origin, recognized by identity
+_ZERO_ORI = (0, 0)
 
 
-def cyl_to_cart(radius, theta, ori=(0, 0)):
+def cyl_to_cart(radius, theta, ori=_ZERO_ORI):
     """Convert polar coordinates into cartesian.
 
     :param radius: distance from ori
     :param theta: angle is the angle starting from abscissa axis
-    :param ori: origin point (Default value = (0)).
+    :param ori: origin point (Default value = (0, 0)).
+
+    """
+    if ori is _ZERO_ORI:
+        return radius * cos(theta), radius * sin(theta)
+    return radius * cos(theta) + ori[0], radius * sin(theta) + ori[1]
+
+
+def batch_cyl_to_cart(radii, thetas, ox=0., oy=0.):
+    """Convert many polar coordinates into cartesian at once.
+
+    The computations use the array library of thetas, with no Python loop.
+
+    :param radii: Distances from the origin, scalar or array broadcastable with thetas.
+    :type radii: float | numpy.ndarray
+    :param thetas: Angles starting from abscissa axis.
+    :type thetas: numpy.ndarray
+    :param ox: Abscissa of the origin, scalar or array. (Default value = 0.)
+    :type ox: float | numpy.ndarray
+    :param oy: Ordinate of the origin, scalar or array. (Default value = 0.)
+    :type oy: float | numpy.ndarray
 
+    :returns: Abscissas and ordinates.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
     """
-    return radius * math.cos(theta) + ori[0], radius * math.sin(theta) + ori[1]
+    x = radii * np.cos(thetas)
+    y = radii * np.sin(thetas)
+    # In place, no temporary array for the sums
+    x += ox
+    y += oy
+    return x, y
 
 
 def line_from_points(first_point, second_point):
@@ -5,7 +5,12 @@ The geometry module provides general geometry functions.
 
 It is used extensively, so each function should be highly optimized.
 """
-import math
+# Bound once, a module attribute lookup at each call is slower
+from math import copysign, fabs, sqrt
+
+import numpy as np
+
+from .core import sqr_dist
 
 
 def secant_circles_intersections(
@@ -14,7 +19,7 @@ def secant_circles_intersections(
     """Return the TWO intersections of secant circles."""
     # Distance between projected P and points
     # and the points of which P is projection
-    height = math.sqrt(radius1 ** 2 - mid_dist ** 2) / distance
+    height = sqrt(max(radius1 * radius1 - mid_dist * mid_dist, 0)) / distance
     inter1 = (
         projected[0] + height * dist_y,
         projected[1] - height * dist_x
@@ -54,38 +59,118 @@ def circle_intersect(circle1, circle2, tol=0.0):
     x_2, y_2, radius2 = circle2
 
     dist_x, dist_y = x_2 - x_1, y_2 - y_1
-    # Distance between circles centers
-    distance = math.sqrt(dist_x ** 2 + dist_y ** 2)
-    if distance > radius1 + radius2:
+    # Squared distance between circles centers, no square root to reject them
+    sqr_distance = dist_x * dist_x + dist_y * dist_y
+    sum_radii = radius1 + radius2
+    if sqr_distance > sum_radii * sum_radii:
         # Circles two far
         return (0, )
-    if distance < abs(radius2 - radius1):
+    diff_radii = radius2 - radius1
+    if sqr_distance < diff_radii * diff_radii:
         # One circle in the other
         return (0, )
-    if distance <= tol and abs(radius1 - radius2) <= tol:
+    distance = sqrt(sqr_distance)
+    if distance <= tol and fabs(radius1 - radius2) <= tol:
         # Same circle
         return 3, circle1
 
     dual = True
-    if abs(abs(radius1 - distance) - radius2) <= tol:
+    if fabs(fabs(radius1 - distance) - radius2) <= tol:
         # Tangent circles
         dual = False
 
+    # A single division, multiplications are faster
+    inv_distance = 1 / distance
     # Distance from first circle's center to orthogonal projection
     # of circles intersections, on the axis between circles' centers
-    mid_dist = (radius1 ** 2 - radius2 ** 2 + distance ** 2) / distance / 2
+    sqr_radius1 = radius1 * radius1
+    mid_dist = (sqr_radius1 - radius2 * radius2 + sqr_distance) * inv_distance * .5
 
     # projected point is easy to compute now
-    projected = (
-        x_1 + (mid_dist * dist_x) / distance,
-        y_1 + (mid_dist * dist_y) / distance
-    )
+    mid_ratio = mid_dist * inv_distance
+    projected_x = x_1 + mid_ratio * dist_x
+    projected_y = y_1 + mid_ratio * dist_y
 
     if dual:
-        return secant_circles_intersections(
-            distance, dist_x, dist_y, mid_dist, radius1, projected
+        # Same as secant_circles_intersections, inlined for speed
+        # Rounding errors may give a slightly negative value near tangency
+        radicand = sqr_radius1 - mid_dist * mid_dist
+        height = sqrt(radicand) * inv_distance if radicand > 0 else 0.
+        height_x, height_y = height * dist_x, height * dist_y
+        return (
+            2,
+            (projected_x + height_y, projected_y - height_x),
+            (projected_x - height_y, projected_y + height_x)
         )
-    return 1, projected
+    return 1, (projected_x, projected_y)
+
+
+def circle_intersect_batch(circles1, circles2, tol=0.0, out=None):
+    """
+    Get the intersections of many pairs of circles at once.
+
+    Vectorized version of :func:`circle_intersect`, the circles of each row are
+    intersected with numpy operations on the whole arrays.
+    Arrays keep their floating type, and are created with the array library of
+    circles1 (NEP 18 and NEP 35): CuPy arrays are intersected on the GPU.
+
+    :param circles1: First circles, one (abscissa, ordinate, radius) per row.
+    :type circles1: numpy.ndarray
+    :param circles2: Second circles, with the same shape as circles1.
+    :type circles2: numpy.ndarray
+    :param tol: distance under which two points are considered equal (Default value = 0.0)
+    :type tol: float
+    :param out: Preallocated array of shape (n, 2, 2) for the intersections,
+        to reuse it across calls. (Default value = None)
+    :type out: numpy.ndarray | None
+
+    :returns: The type of intersection of each pair as int8, with the same codes as
+        :func:`circle_intersect` (0, 1, 2 or 3), and the two intersections of each
+        pair, shape (n, 2, 2). Both points are the same for tangent circles,
+        and NaN when there is no intersection or the circles are the same.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+    """
+    if not hasattr(circles1, "__array_function__"):
+        circles1 = np.asarray(circles1, dtype=float)
+    if not hasattr(circles2, "__array_function__"):
+        circles2 = np.asarray(circles2, dtype=circles1.dtype, like=circles1)
+    x_1, y_1, radius1 = circles1[..., 0], circles1[..., 1], circles1[..., 2]
+    x_2, y_2, radius2 = circles2[..., 0], circles2[..., 1], circles2[..., 2]
+
+    dist_x, dist_y = x_2 - x_1, y_2 - y_1
+    sqr_distance = dist_x * dist_x + dist_y * dist_y
+    separated = (
+        (sqr_distance > np.square(radius1 + radius2))
+        | (sqr_distance < np.square(radius2 - radius1))
+    )
+    distance = np.sqrt(sqr_distance)
+    same = ~separated & (distance <= tol) & (np.abs(radius1 - radius2) <= tol)
+    tangent = ~separated & ~same & (np.abs(np.abs(radius1 - distance) - radius2) <= tol)
+    kind = np.full(distance.shape, 2, dtype=np.int8, like=distance)
+    kind[tangent] = 1
+    kind[separated] = 0
+    kind[same] = 3
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        inv_distance = 1 / distance
+        sqr_radius1 = radius1 * radius1
+        mid_dist = (sqr_radius1 - radius2 * radius2 + sqr_distance) * inv_distance / 2
+        projected_x = x_1 + mid_dist * dist_x * inv_distance
+        projected_y = y_1 + mid_dist * dist_y * inv_distance
+        height = np.sqrt(np.maximum(sqr_radius1 - mid_dist * mid_dist, 0)) * inv_distance
+    height[tangent] = 0
+    if out is None:
+        intersections = np.empty(
+            distance.shape + (2, 2), dtype=projected_x.dtype, like=projected_x
+        )
+    else:
+        intersections = out
+    intersections[..., 0, 0] = projected_x + height * dist_y
+    intersections[..., 0, 1] = projected_y - height * dist_x
+    intersections[..., 1, 0] = projected_x - height * dist_y
+    intersections[..., 1, 1] = projected_y + height * dist_x
+    intersections[separated | same] = np.nan
+    return kind, intersections
 
 
 def circle_line_from_points_intersection(circle, first_point, second_point):
@@ -100,39 +185,97 @@ def circle_line_from_points_intersection(circle, first_point, second_point):
     :return: Either 0, 1 or two intersection points, the first elements indicates the intersection type.
     :rtype: tuple | tuple[tuple[float, float]] | tuple[tuple[float, float], tuple[float, float]]
     """
+    x_0, y_0, radius = circle
     # Move axis to circle center
-    first_point = first_point[0] - circle[0], first_point[1] - circle[1]
-    second_point = second_point[0] - circle[0], second_point[1] - circle[1]
+    first_x, first_y = first_point[0] - x_0, first_point[1] - y_0
+    second_x, second_y = second_point[0] - x_0, second_point[1] - y_0
 
-    dx, dy = second_point[0] - first_point[0], second_point[1] - first_point[1]
+    dx, dy = second_x - first_x, second_y - first_y
 
-    dr2 = dx ** 2 + dy ** 2
+    dr2 = dx * dx + dy * dy
 
-    cross = first_point[0] * second_point[1] - second_point[0] * first_point[1]
+    cross = first_x * second_y - second_x * first_y
 
-    discriminant = circle[2] ** 2 * dr2 - cross ** 2
+    discriminant = radius * radius * dr2 - cross * cross
 
     if 0 > discriminant:
         # no intersection
         return tuple()
 
-    reduced = cross / dr2, math.sqrt(discriminant) / dr2
+    inv_dr2 = 1 / dr2
+    reduced = cross * inv_dr2
 
     if discriminant == 0:
         # Tangent line
-        return ((reduced[0] * dy + circle[0], -reduced[0] * dx + circle[1]), )
+        return ((reduced * dy + x_0, -reduced * dx + y_0), )
 
     # discriminant > 0, two intersections
+    height = sqrt(discriminant) * inv_dr2
+    # Sign of dy without a branch, height is positive
+    offset_x = dx * copysign(height, dy)
+    offset_y = fabs(dy) * height
+    center_x, center_y = reduced * dy + x_0, -reduced * dx + y_0
     return (
-        (
-            reduced[0] * dy - (1 if dy >= 0 else -1) * dx * reduced[1] + circle[0],
-            -reduced[0] * dx - abs(dy) * reduced[1] + circle[1]
-        ),
-        (
-            reduced[0] * dy + (1 if dy >= 0 else -1) * dx * reduced[1] + circle[0],
-            -reduced[0] * dx + abs(dy) * reduced[1] + circle[1]
-        )
+        (center_x - offset_x, center_y - offset_y),
+        (center_x + offset_x, center_y + offset_y)
+    )
+
+
+def circle_line_from_points_intersection_batch(circles, first_points, second_points):
+    """
+    Intersections of many circles with lines defined by two points, at once.
+
+    Vectorized version of :func:`circle_line_from_points_intersection`.
+    Arrays keep their floating type, and are created with the array library of
+    circles (NEP 18 and NEP 35).
+
+    :param circles: Circles, one (abscissa, ordinate, radius) per row.
+    :type circles: numpy.ndarray
+    :param first_points: One point of each line, shape (n, 2).
+    :type first_points: numpy.ndarray
+    :param second_points: Another point of each line, shape (n, 2).
+    :type second_points: numpy.ndarray
+
+    :returns: The number of intersections of each pair as int8 (0, 1 or 2), and
+        the two intersections of each pair, shape (n, 2, 2), in the same order as
+        :func:`circle_line_from_points_intersection`. Both points are the same for
+        tangent lines, and NaN when there is no intersection.
+    :rtype: tuple[numpy.ndarray, numpy.ndarray]
+    """
+    if not hasattr(circles, "__array_function__"):
+        circles = np.asarray(circles, dtype=float)
+    first_points = np.asarray(first_points, dtype=circles.dtype, like=circles)
+    second_points = np.asarray(second_points, dtype=circles.dtype, like=circles)
+    x_0, y_0, radius = circles[..., 0], circles[..., 1], circles[..., 2]
+    # Move axis to circle center
+    first_x, first_y = first_points[..., 0] - x_0, first_points[..., 1] - y_0
+    second_x, second_y = second_points[..., 0] - x_0, second_points[..., 1] - y_0
+
+    dx, dy = second_x - first_x, second_y - first_y
+    dr2 = dx * dx + dy * dy
+    cross = first_x * second_y - second_x * first_y
+    discriminant = radius * radius * dr2 - cross * cross
+
+    count = np.full(discriminant.shape, 2, dtype=np.int8, like=discriminant)
+    count[discriminant == 0] = 1
+    count[discriminant < 0] = 0
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        inv_dr2 = 1 / dr2
+        reduced = cross * inv_dr2
+        # A negative discriminant gives NaN coordinates
+        height = np.sqrt(discriminant) * inv_dr2
+    offset_x = np.where(dy >= 0, dx, -dx) * height
+    offset_y = np.abs(dy) * height
+    center_x, center_y = reduced * dy + x_0, -reduced * dx + y_0
+    intersections = np.empty(
+        discriminant.shape + (2, 2), dtype=center_x.dtype, like=center_x
     )
+    intersections[..., 0, 0] = center_x - offset_x
+    intersections[..., 0, 1] = center_y - offset_y
+    intersections[..., 1, 0] = center_x + offset_x
+    intersections[..., 1, 1] = center_y + offset_y
+    return count, intersections
 
 
 def circle_line_intersection(circle, line):
@@ -141,6 +284,10 @@ def circle_line_intersection(circle, line):
 
     From https://mathworld.wolfram.com/Circle-LineIntersection.html
 
+    The intersections are computed from the cartesian equation, with a single
+    division. When the line is defined by two points in the first place, call
+    :func:`circle_line_from_points_intersection` instead.
+
     Circle((x0,y0), r).intersection(Line(a*x+b*y+c)) # sympy
 
     :param circle: Sequence of (abscissa, ordinate, radius)
@@ -151,15 +298,72 @@ def circle_line_intersection(circle, line):
     :return: Nothing, one or two intersections. The length of the tuple gives the intersection type.
     :rtype: tuple | tuple[tuple[float, float]] | tuple[tuple[float, float], tuple[float, float]]
     """
-    # Find two points on the line
-    if line[1] != 0:
-        first_point = 0, - line[2] / line[1]
-        second_point = 1, - (line[2] + line[0]) / line[1]
-    else:
-        first_point = - line[2] / line[0], 0
-        second_point = - (line[2] + line[1]) / line[0], 1
+    x_0, y_0, radius = circle
+    a, b, c = line
+    # Line equation with the circle center as origin
+    c += a * x_0 + b * y_0
+    sqr_norm = a * a + b * b
+
+    discriminant = radius * radius * sqr_norm - c * c
+
+    if 0 > discriminant:
+        # no intersection
+        return tuple()
+
+    inv_sqr_norm = 1 / sqr_norm
+    reduced = c * inv_sqr_norm
+    # Projection of the circle center on the line
+    foot_x, foot_y = x_0 - a * reduced, y_0 - b * reduced
+
+    if discriminant == 0:
+        # Tangent line
+        return ((foot_x, foot_y), )
+
+    # discriminant > 0, two intersections, along the direction (b, -a).
+    # The direction points to increasing ordinates (abscissas for a horizontal line),
+    # so that the first intersection is the lowest, or the leftmost.
+    height = sqrt(discriminant) * inv_sqr_norm
+    height = copysign(height, -a) if a else copysign(height, b)
+    offset_x, offset_y = b * height, -a * height
+    return (
+        (foot_x - offset_x, foot_y - offset_y),
+        (foot_x + offset_x, foot_y + offset_y)
+    )
+
+
+def _points_intersection(point_1, point_2, tol):
+    """Intersection of two points, see :func:`intersection`."""
+    # Squared distances, no square root is needed for a comparison
+    if point_1 == point_2 or tol > 0 and sqr_dist(point_1, point_2) <= tol * tol:
+        return point_1
+    return None
+
+
+def _circles_intersection(circle_1, circle_2, tol):
+    """Intersection of two circles, see :func:`intersection`."""
+    return circle_intersect(circle_1, circle_2)[1:]
+
+
+def _point_circle_intersection(point, circle, tol):
+    """Intersection of a point and a circle, see :func:`intersection`."""
+    reach = circle[2] + tol
+    if reach >= 0 and sqr_dist(point, circle[:2]) <= reach * reach:
+        return point
+    return None
+
+
+def _circle_point_intersection(circle, point, tol):
+    """Intersection of a circle and a point, see :func:`intersection`."""
+    return _point_circle_intersection(point, circle, tol)
+
 
-    return circle_line_from_points_intersection(circle, first_point, second_point)
+# Intersection function for each pair of object lengths
+_INTERSECTIONS = {
+    (2, 2): _points_intersection,
+    (3, 3): _circles_intersection,
+    (2, 3): _point_circle_intersection,
+    (3, 2): _circle_point_intersection,
+}
 
 
 def intersection(obj_1, obj_2, tol=0.0):
@@ -177,22 +381,10 @@ def intersection(obj_1, obj_2, tol=0.0):
     :returns: The intersection found, if any
     :rtype: tuple[float, float] | tuple[float, float, float] | None
     """
-    # Two points
-    if len(obj_1) == 2 and len(obj_2) == 2:
-        if obj_1 == obj_2 or tol and math.dist(obj_1, obj_2) <= tol:
-            return obj_1
-        return
-    # Two circles
-    if len(obj_1) == 3 and len(obj_2) == 3:
-        return circle_intersect(obj_1, obj_2)[1:]
-    # Point and circle
-    if len(obj_1) == 2 and len(obj_2) == 3:
-        if math.dist(obj_1, obj_2[:2]) - obj_2[2] <= tol:
-            return obj_1
-        return
-    # Circle and point
-    if len(obj_1) == 3 and len(obj_2) == 2:
-        return intersection(obj_1=obj_2, obj_2=obj_1, tol=tol)
+    solver = _INTERSECTIONS.get((len(obj_1), len(obj_2)))
+    if solver is None:
+        return None
+    return solver(obj_1, obj_2, tol)
 
 
 def bounding_box(locus):
@@ -201,21 +393,30 @@ def bounding_box(locus):
 
     Parameters
     ----------
-    locus : list[tuple[float]]
+    locus : list[tuple[float]] | numpy.ndarray
         A list of point or any iterable with the same structure.
+        A numpy array of shape (n_points, 2) is reduced without a Python loop.
 
     Returns
     -------
     tuple[float]
         Bounding box as (y_min, x_max, y_max, x_min).
     """
-    y_min = float('inf')
-    x_min = float('inf')
-    y_max = -float('inf')
-    x_max = -float('inf')
+    if isinstance(locus, np.ndarray):
+        mins, maxs = locus.min(axis=-2), locus.max(axis=-2)
+        return mins[..., 1], maxs[..., 0], maxs[..., 1], mins[..., 0]
+    # Converting a sequence to an array costs more than this loop
+    y_min = x_min = float('inf')
+    y_max = x_max = -float('inf')
     for point in locus:
-        y_min = min(y_min, point[1])
-        x_min = min(x_min, point[0])
-        y_max = max(y_max, point[1])
-        x_max = max(x_max, point[0])
+        x, y = point[0], point[1]
+        # Comparisons are faster than calls to min and max
+        if x < x_min:
+            x_min = x
+        if x > x_max:
+            x_max = x
+        if y < y_min:
+            y_min = y
+        if y > y_max:
+            y_max = y
     return y_min, x_max, y_max, x_min
@@ -91,39 +91,38 @@ class Revolute(pl_joint.Joint):
         """Compute the position of revolute joint, use the two linked joints."""
         if self.joint0 is None:
             return
+        joint0, joint1 = self.joint0, self.joint1
         # Fixed joint as reference. In links, we only keep fixed objects
-        ref = tuple(x for x in self.__get_joints__() if None not in x.coord())
-        if len(ref) == 0:
+        if None in (joint0.x, joint0.y, joint1.x, joint1.y):
+            if None not in joint0.coord() or None not in joint1.coord():
+                warnings.warn(
+                    "Unable to set coordinates of revolute joint {}:"
+                    "Only one constraint is set."
+                    "Coordinates unchanged".format(self.name)
+                )
             # Don't change coordinates (irrelevant)
             return
-        if len(ref) == 1:
-            warnings.warn(
-                "Unable to set coordinates of revolute joint {}:"
-                "Only one constraint is set."
-                "Coordinates unchanged".format(self.name)
+        # Most common case, optimized here
+        intersections = pl_geom.circle_intersect(
+            (joint0.x, joint0.y, self.r0),
+            (joint1.x, joint1.y, self.r1)
+        )
+        if intersections[0] == 0:
+            raise pl_exceptions.UnbuildableError(self)
+        if intersections[0] == 1:
+            self.x, self.y = intersections[1]
+        elif intersections[0] == 2:
+            self.x, self.y = pl_geom.core.get_nearest_point(
+                self.coord(), intersections[1], intersections[2]
             )
-        elif len(ref) == 2:
-            # Most common case, optimized here
-            intersections = pl_geom.circle_intersect(
-                self.__get_joint_as_circle__(0),
-                self.__get_joint_as_circle__(1)
+        elif intersections[0] == 3:
+            warnings.warn(
+                f"Joint {self.name} has an infinite number of"
+                "solutions, position will be arbitrary"
             )
-            if intersections[0] == 0:
-                raise pl_exceptions.UnbuildableError(self)
-            if intersections[0] == 1:
-                self.x, self.y = intersections[1]
-            elif intersections[0] == 2:
-                self.x, self.y = pl_geom.core.get_nearest_point(
-                    self.coord(), intersections[1], intersections[2]
-                )
-            elif intersections[0] == 3:
-                warnings.warn(
-                    f"Joint {self.name} has an infinite number of"
-                    "solutions, position will be arbitrary"
-                )
-                # We project position on circle of possible positions
-                angle = atan2(self.y - self.joint0.y, self.x - self.joint0.x)
-                self.x, self.y = pl_geom.cyl_to_cart(self.r0, angle, self.joint0.coord())
+            # We project position on circle of possible positions
+            angle = atan2(self.y - joint0.y, self.x - joint0.x)
+            self.x, self.y = pl_geom.cyl_to_cart(self.r0, angle, joint0.coord())
 
     def get_constraints(self):
         """Return the two constraining distances of this joint."""
@@ -1,6 +1,10 @@
 """
 Analysis tools for linkages.
 """
+import functools
+
+import numpy as np
+
 from ..exceptions import UnbuildableError
 
 
@@ -8,7 +12,7 @@ def kinematic_default_test(func, error_penalty):
     """Standard run for any linkage before a complete fitness evaluation.
 
     This decorator makes a kinematic simulation, before passing the loci to the
-    decorated function.
+    decorated function. The loci are a numpy array of shape (iterations, n_joints, 2).
 
     :param func: Fitness function to be decorated.
     :type func: Callable
@@ -19,6 +23,8 @@ def kinematic_default_test(func, error_penalty):
 
     """
 
+    # Keep the original name so that the decorated function can be pickled
+    @functools.wraps(func)
     def wrapper(linkage, params, init_pos=None):
         """Decorated function.
 
@@ -38,20 +44,13 @@ def kinematic_default_test(func, error_penalty):
         try:
             points = 12
             n = linkage.get_rotation_period()
-            # Complete revolution with 12 points
-            tuple(
-                tuple(i) for i in linkage.step(
-                    iterations=points + 1, dt=n / points
-                )
-            )
+            # Complete revolution with 12 points, only to check that it can be built
+            for _ in linkage.step(iterations=points + 1, dt=n / points):
+                pass
             # Again with n points, and at least 12 iterations
             n = 96
             factor = int(points / n) + 1
-            loci = tuple(
-                tuple(i) for i in linkage.step(
-                    iterations=n * factor, dt=1 / factor
-                )
-            )
+            loci = linkage.step_array(iterations=n * factor, dt=1 / factor)
         except UnbuildableError:
             return error_penalty
         else:
@@ -69,20 +68,31 @@ def bounding_box(locus):
     """Compute the bounding box of a locus.
 
     :param locus: A list of points or any iterable with the same structure.
-    :type locus: list[tuple[float, float]] | tuple[tuple[float, float]]
+        A numpy array of shape (n_points, 2) is reduced without a Python loop,
+        and an array of shape (n_loci, n_points, 2) gives the bounding box
+        of each locus at once.
+    :type locus: list[tuple[float, float]] | tuple[tuple[float, float]] | numpy.ndarray
 
     :returns: Bounding box as (y_min, x_max, y_max, x_min).
-    :rtype: tuple[float, float, float, float]
+        For a batch of loci, each element is an array of n_loci values.
+    :rtype: tuple[float, float, float, float] | tuple[numpy.ndarray]
     """
-    y_min = float('inf')
-    x_min = float('inf')
-    y_max = -float('inf')
-    x_max = -float('inf')
+    if isinstance(locus, np.ndarray):
+        mins, maxs = locus.min(axis=-2), locus.max(axis=-2)
+        return mins[..., 1], maxs[..., 0], maxs[..., 1], mins[..., 0]
+    y_min = x_min = float('inf')
+    y_max = x_max = -float('inf')
     for point in locus:
-        y_min = min(y_min, point[1])
-        x_min = min(x_min, point[0])
-        y_max = max(y_max, point[1])
-        x_max = max(x_max, point[0])
+        x, y = point[0], point[1]
+        # Comparisons are faster than calls to min and max
+        if x < x_min:
+            x_min = x
+        if x > x_max:
+            x_max = x
+        if y < y_min:
+            y_min = y
+        if y > y_max:
+            y_max = y
     return y_min, x_max, y_max, x_min
 
 
@@ -90,11 +100,14 @@ def movement_bounding_box(loci):
     """
     Bounding box for a group of loci.
 
-    :param loci:
+    :param loci: Successive positions of the joints.
+        A numpy array of shape (iterations, n_joints, 2) is reduced at once.
 
     :rtype: tuple[float, float, float, float]
 
     """
+    if isinstance(loci, np.ndarray):
+        return bounding_box(loci.reshape(-1, 2))
     bb = (float('inf'), -float('inf'), -float('inf'), float('inf'))
     for locus in loci:
         new_bb = bounding_box(locus)
@@ -0,0 +1,307 @@
+"""
+Simulation of a batch of linkages sharing the same topology.
+
+Coordinates are stored as two arrays (abscissas and ordinates) of shape
+(n_sets, n_nodes), so that each joint is solved for all the sets at once.
+Sets that cannot be built get NaN coordinates.
+
+Arrays are created like the input constraints, with the NumPy dispatch
+protocols (NEP 18 and NEP 35). An array library implementing them, such as
+CuPy, runs the whole simulation on its own device.
+"""
+import numpy as np
+
+from ..geometry import batch_cyl_to_cart
+from ..joints import Crank, Fixed, Linear, Revolute, Static
+
+
+def _constraint_columns(joints):
+    """Column index of the first constraint of each joint in flat constraints.
+
+    The order is the same as in :meth:`Linkage.get_num_constraints`.
+
+    :param joints: Joints of the linkage.
+    :type joints: tuple[pylinkage.joints.joint.Joint]
+
+    :rtype: dict[pylinkage.joints.joint.Joint, int]
+    """
+    columns = {}
+    column = 0
+    for joint in joints:
+        columns[joint] = column
+        column += len(joint.get_constraints())
+    return columns
+
+
+def _nodes(linkage):
+    """All the joints involved in the simulation, with their index.
+
+    Anchors that are not part of the linkage (static points defined from
+    tuples) are appended after the linkage joints.
+
+    :param linkage: Linkage to simulate.
+    :type linkage: pylinkage.linkage.Linkage
+
+    :rtype: dict[pylinkage.joints.joint.Joint, int]
+    """
+    index = {joint: i for i, joint in enumerate(linkage.joints)}
+    for joint in linkage.joints:
+        for parent in (joint.joint0, joint.joint1, getattr(joint, "joint2", None)):
+            if parent is not None and parent not in index:
+                index[parent] = len(index)
+    return index
+
+
+def solving_plan(linkage):
+    """Nodes and solving steps of a linkage for batch simulations.
+
+    The plan only depends on the joints and the solving order, it is computed
+    once and stored on the linkage. A linkage sent to worker processes
+    carries its plan along.
+
+    :param linkage: Linkage to simulate.
+    :type linkage: pylinkage.linkage.Linkage
+
+    :returns: All the nodes, in index order, and (joint, index, parent indexes,
+        first constraint column) for each joint to solve, in solving order.
+    :rtype: tuple[tuple[pylinkage.joints.joint.Joint], tuple[tuple]]
+    """
+    if linkage._batch_plan is not None and linkage._batch_plan[0] is linkage._solve_order:
+        return linkage._batch_plan[1]
+    nodes = _nodes(linkage)
+    columns = _constraint_columns(linkage.joints)
+    steps = []
+    for joint in linkage._solve_order:
+        if isinstance(joint, Static) or joint.joint0 is None:
+            continue
+        parents = tuple(
+            nodes[parent] if parent is not None else None
+            for parent in (joint.joint0, joint.joint1, getattr(joint, "joint2", None))
+        )
+        steps.append((joint, nodes[joint], parents, columns[joint]))
+    plan = tuple(nodes), tuple(steps)
+    linkage._batch_plan = linkage._solve_order, plan
+    return plan
+
+
+def reload_crank(x, y, joint, i, parent, radius, dt):
+    """Rotate a crank for all the sets.
+
+    :param numpy.ndarray x: Abscissas of shape (n_sets, n_nodes), modified in place.
+    :param numpy.ndarray y: Ordinates of shape (n_sets, n_nodes), modified in place.
+    :param Crank joint: The crank to move.
+    :param int i: Index of the crank.
+    :param int parent: Index of the rotation center.
+    :param numpy.ndarray radius: Crank length for each set.
+    :param float dt: Fraction of steps to take.
+    """
+    rot = np.arctan2(y[:, i] - y[:, parent], x[:, i] - x[:, parent])
+    rot += joint.angle * dt
+    x[:, i], y[:, i] = batch_cyl_to_cart(radius, rot, x[:, parent], y[:, parent])
+
+
+def reload_fixed(x, y, i, parent0, parent1, radius, angle):
+    """Place a fixed joint for all the sets.
+
+    :param numpy.ndarray x: Abscissas of shape (n_sets, n_nodes), modified in place.
+    :param numpy.ndarray y: Ordinates of shape (n_sets, n_nodes), modified in place.
+    :param int i: Index of the joint.
+    :param int parent0: Index of the origin of the local space.
+    :param int parent1: Index of the joint giving the local abscissa axis.
+    :param numpy.ndarray radius: Distance to parent0 for each set.
+    :param numpy.ndarray angle: Angle (parent1, parent0, joint) for each set.
+    """
+    rot = np.arctan2(y[:, parent1] - y[:, parent0], x[:, parent1] - x[:, parent0])
+    rot += angle
+    x[:, i], y[:, i] = batch_cyl_to_cart(radius, rot, x[:, parent0], y[:, parent0])
+
+
+def revolute_invariants(radius0, radius1):
+    """Terms of the circle intersection that only depend on the radii.
+
+    They are computed once per simulation, see :func:`reload_revolute`.
+
+    :param numpy.ndarray radius0: Distance to the first circle center for each set.
+    :param numpy.ndarray radius1: Distance to the second circle center for each set.
+
+    :returns: Square of radius0, difference of the squares of the radii,
+        bounds of the squared distance between centers for the circles to intersect,
+        and whether both radii are equal.
+    :rtype: tuple[numpy.ndarray]
+    """
+    sqr0 = radius0 * radius0
+    return (
+        sqr0, sqr0 - radius1 * radius1,
+        (radius0 + radius1) ** 2, (radius1 - radius0) ** 2,
+        radius0 == radius1
+    )
+
+
+def reload_revolute(x, y, i, parent0, parent1, radius0, sqr0, sqr_diff, sqr_max, sqr_min, same_radii):
+    """Intersect two circles for all the sets, keeping the nearest solution.
+
+    The intersections are written relatively to the squared distance between
+    centers, so that no square root is needed but the height of the triangle.
+
+    :param numpy.ndarray x: Abscissas of shape (n_sets, n_nodes), modified in place.
+    :param numpy.ndarray y: Ordinates of shape (n_sets, n_nodes), modified in place.
+    :param int i: Index of the joint.
+    :param int parent0: Index of the first circle center.
+    :param int parent1: Index of the second circle center.
+    :param numpy.ndarray radius0: Distance to parent0 for each set.
+    :param numpy.ndarray sqr0: Square of radius0.
+    :param numpy.ndarray sqr_diff: Square of radius0 minus square of radius1.
+    :param numpy.ndarray sqr_max: Largest squared distance between centers to intersect.
+    :param numpy.ndarray sqr_min: Smallest squared distance between centers to intersect.
+    :param numpy.ndarray same_radii: True where both radii are equal.
+    """
+    x_0, y_0 = x[:, parent0], y[:, parent0]
+    dist_x, dist_y = x[:, parent1] - x_0, y[:, parent1] - y_0
+    sqr_dist = dist_x * dist_x + dist_y * dist_y
+    inv_sqr_dist = 1 / sqr_dist
+    # Position of the chord on the line between centers, and half the chord,
+    # both relative to the distance between centers
+    along = (sqr_diff * inv_sqr_dist + 1) / 2
+    height = np.sqrt(np.maximum(sqr0 * inv_sqr_dist - along * along, 0))
+    projected_x = x_0 + along * dist_x
+    projected_y = y_0 + along * dist_y
+    # Nearest intersection from the previous position: side of the previous
+    # position relative to the line between centers
+    first = dist_x * (y[:, i] - projected_y) < dist_y * (x[:, i] - projected_x)
+    height[~first] *= -1
+    new_x = projected_x + height * dist_y
+    new_y = projected_y - height * dist_x
+    # Same circle: project the previous position on it
+    same = (sqr_dist == 0) & same_radii
+    if same.any():
+        angle = np.arctan2(y[:, i] - y_0, x[:, i] - x_0)
+        new_x = np.where(same, x_0 + radius0 * np.cos(angle), new_x)
+        new_y = np.where(same, y_0 + radius0 * np.sin(angle), new_y)
+    # No intersection
+    unbuildable = (sqr_dist > sqr_max) | (sqr_dist < sqr_min)
+    new_x[unbuildable] = np.nan
+    new_y[unbuildable] = np.nan
+    x[:, i] = new_x
+    y[:, i] = new_y
+
+
+def reload_linear(x, y, i, parent0, parent1, parent2, radius):
+    """Intersect a circle and a line for all the sets, keeping the nearest solution.
+
+    :param numpy.ndarray x: Abscissas of shape (n_sets, n_nodes), modified in place.
+    :param numpy.ndarray y: Ordinates of shape (n_sets, n_nodes), modified in place.
+    :param int i: Index of the joint.
+    :param int parent0: Index of the circle center.
+    :param int parent1: Index of the first point of the line.
+    :param int parent2: Index of the second point of the line.
+    :param numpy.ndarray radius: Distance to parent0 for each set.
+    """
+    # Move axis to circle center
+    first_x, first_y = x[:, parent1] - x[:, parent0], y[:, parent1] - y[:, parent0]
+    second_x, second_y = x[:, parent2] - x[:, parent0], y[:, parent2] - y[:, parent0]
+    dx, dy = second_x - first_x, second_y - first_y
+    dr2 = dx * dx + dy * dy
+    cross = first_x * second_y - second_x * first_y
+    discriminant = radius * radius * dr2 - cross * cross
+    reduced0, reduced1 = cross / dr2, np.sqrt(discriminant) / dr2
+    sign = np.where(dy >= 0, 1, -1)
+    inter1_x = reduced0 * dy - sign * dx * reduced1 + x[:, parent0]
+    inter1_y = -reduced0 * dx - np.abs(dy) * reduced1 + y[:, parent0]
+    inter2_x = reduced0 * dy + sign * dx * reduced1 + x[:, parent0]
+    inter2_y = -reduced0 * dx + np.abs(dy) * reduced1 + y[:, parent0]
+    first = (
+        (inter1_x - x[:, i]) ** 2 + (inter1_y - y[:, i]) ** 2
+        < (inter2_x - x[:, i]) ** 2 + (inter2_y - y[:, i]) ** 2
+    )
+    # A negative discriminant gives NaN coordinates
+    x[:, i] = np.where(first, inter1_x, inter2_x)
+    y[:, i] = np.where(first, inter1_y, inter2_y)
+
+
+def step_batch(
+        linkage, constraints, positions=None, iterations=None, dt=1, dtype=float, joints=None
+):
+    """Simulate the movement of a batch of linkages sharing the same joints.
+
+    :param linkage: Linkage giving the topology. It is not modified.
+    :type linkage: pylinkage.linkage.Linkage
+    :param constraints: One set of flat constraints per row,
+        in the format of :meth:`Linkage.get_num_constraints`.
+        The computations use the array library of constraints.
+    :type constraints: numpy.ndarray
+    :param positions: Initial coordinates of the joints, either shared
+        (shape (n_joints, 2)) or for each set (shape (n_sets, n_joints, 2)).
+        If None, the current coordinates of the linkage are used.
+        (Default value = None).
+    :type positions: numpy.ndarray | tuple[tuple[float, float]] | None
+    :param iterations: Number of iterations to run across.
+        If None, the default is linkage.get_rotation_period().
+        (Default value = None).
+    :type iterations: int | None
+    :param dt: Amount of rotation to turn the cranks by. (Default value = 1).
+    :type dt: float
+    :param dtype: Floating type of the computations, numpy.float32 halves the
+        memory traffic at the cost of precision. (Default value = float).
+    :type dtype: type
+    :param joints: Indexes of the joints to record, all the joints are still
+        simulated. If None, all the joints are recorded. (Default value = None)
+    :type joints: Sequence[int] | None
+
+    :returns: Coordinates of shape (iterations, n_sets, n_recorded, 2).
+        Coordinates of sets that cannot be built are NaN from the first
+        failure on.
+    :rtype: numpy.ndarray
+    """
+    if iterations is None:
+        iterations = linkage.get_rotation_period()
+    if hasattr(constraints, "__array_function__"):
+        constraints = constraints.astype(dtype, copy=False)
+    else:
+        constraints = np.asarray(constraints, dtype=dtype)
+    constraints = np.atleast_2d(constraints)
+    n_sets, n_joints = len(constraints), len(linkage.joints)
+    if positions is None:
+        positions = linkage.get_coords()
+    positions = np.asarray(positions, dtype=dtype, like=constraints)
+
+    nodes, steps = solving_plan(linkage)
+    x = np.empty((n_sets, len(nodes)), dtype=dtype, like=constraints)
+    y = np.empty((n_sets, len(nodes)), dtype=dtype, like=constraints)
+    x[:, :n_joints], y[:, :n_joints] = positions[..., 0], positions[..., 1]
+    for i, joint in enumerate(nodes[n_joints:], n_joints):
+        x[:, i], y[:, i] = joint.x, joint.y
+
+    # Reload functions with their arguments, in solving order
+    solvers = []
+    moving = set()
+    for joint, i, parents, col in steps:
+        if isinstance(joint, Fixed) and moving.isdisjoint(parents):
+            # Its parents never move, place it once for the whole simulation
+            reload_fixed(x, y, i, *parents[:2], constraints[:, col], constraints[:, col + 1])
+            continue
+        moving.add(i)
+        if isinstance(joint, Crank):
+            solvers.append((reload_crank, (joint, i, parents[0], constraints[:, col], dt)))
+        elif isinstance(joint, Fixed):
+            solvers.append(
+                (reload_fixed, (i, *parents[:2], constraints[:, col], constraints[:, col + 1]))
+            )
+        elif isinstance(joint, Revolute):
+            radius0, radius1 = constraints[:, col], constraints[:, col + 1]
+            solvers.append((
+                reload_revolute,
+                (i, *parents[:2], radius0, *revolute_invariants(radius0, radius1))
+            ))
+        elif isinstance(joint, Linear):
+            solvers.append((reload_linear, (i, *parents, constraints[:, col])))
+
+    recorded = slice(n_joints) if joints is None else list(joints)
+    n_recorded = n_joints if joints is None else len(recorded)
+    loci = np.empty((iterations, n_sets, n_recorded, 2), dtype=dtype, like=constraints)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for step in range(iterations):
+            for solver, args in solvers:
+                solver(x, y, *args)
+            loci[step, :, :, 0] = x[:, recorded]
+            loci[step, :, :, 1] = y[:, recorded]
+    return loci
@@ -0,0 +1,342 @@
+"""
+Generation of a simulation function specialized for one linkage.
+
+The joints are solved in a fixed order with a fixed type, so instead of
+calling the reload method of each joint at each iteration, the whole step is
+written as straight-line Python code. Coordinates are kept in local variables,
+and only written back to the joints at the end of the simulation.
+Values that only depend on the constraints (sums and squares of distances,
+crank angle steps) are computed once, before the loop, as well as the
+position of fixed joints attached to joints that never move.
+"""
+import functools
+import math
+import warnings
+
+from .. import geometry as pl_geom
+from ..exceptions import UnbuildableError
+from ..joints import Crank, Fixed, Linear, Revolute
+from .batch import solving_plan
+
+
+def _crank(joint, i, parents):
+    """Source lines to move a crank.
+
+    :param Crank joint: The crank.
+    :param int i: Index of the crank.
+    :param tuple[int] parents: Index of the rotation center first.
+    :returns: Lines reading the joint constraints, lines computing invariants
+        from them, and lines to run at each step.
+        None if the joint is not completely defined.
+    :rtype: tuple[list[str], list[str], list[str]] | None
+    """
+    p = parents[0]
+    reads = [f"r{i} = j{i}.r", f"a{i} = j{i}.angle"]
+    invariants = [f"a{i} *= dt"]
+    body = [
+        f"rot = atan2(y{i} - y{p}, x{i} - x{p}) + a{i}",
+        f"x{i}, y{i} = r{i} * cos(rot) + x{p}, r{i} * sin(rot) + y{p}",
+    ]
+    return reads, invariants, body
+
+
+def _fixed(joint, i, parents):
+    """Source lines to place a fixed joint.
+
+    :param Fixed joint: The joint.
+    :param int i: Index of the joint.
+    :param tuple[int] parents: Index of the origin, then of the abscissa axis joint.
+    :returns: Lines reading the joint constraints, lines computing invariants
+        from them, and lines to run at each step.
+        None if the joint is not completely defined.
+    :rtype: tuple[list[str], list[str], list[str]] | None
+    """
+    p0, p1 = parents[:2]
+    if p1 is None:
+        return None
+    reads = [f"r{i} = j{i}.r", f"a{i} = j{i}.angle"]
+    body = [
+        f"rot = a{i} + atan2(y{p1} - y{p0}, x{p1} - x{p0})",
+        f"x{i}, y{i} = r{i} * cos(rot) + x{p0}, r{i} * sin(rot) + y{p0}",
+    ]
+    return reads, [], body
+
+
+def _revolute(joint, i, parents):
+    """Source lines to intersect two circles for a revolute joint.
+
+    :param Revolute joint: The joint.
+    :param int i: Index of the joint.
+    :param tuple[int] parents: Index of the two circle centers.
+    :returns: Lines reading the joint constraints, lines computing invariants
+        from them, and lines to run at each step.
+        None if the joint is not completely defined.
+    :rtype: tuple[list[str], list[str], list[str]] | None
+    """
+    p0, p1 = parents[:2]
+    if p1 is None:
+        return None
+    reads = [f"r{i}_0 = j{i}.r0", f"r{i}_1 = j{i}.r1"]
+    # Same computations as geometry.circle_intersect, with invariants hoisted
+    invariants = [
+        # Bounds of the squared distance between centers
+        f"r{i}_max, r{i}_min = r{i}_0 + r{i}_1, r{i}_1 - r{i}_0",
+        f"r{i}_max, r{i}_min = r{i}_max * r{i}_max, r{i}_min * r{i}_min",
+        f"r{i}_sqr = r{i}_0 * r{i}_0",
+        f"r{i}_sqr_diff = r{i}_sqr - r{i}_1 * r{i}_1",
+    ]
+    body = [
+        f"dist_x, dist_y = x{p1} - x{p0}, y{p1} - y{p0}",
+        "sqr_distance = dist_x * dist_x + dist_y * dist_y",
+        f"if sqr_distance > r{i}_max or sqr_distance < r{i}_min:",
+        f"    raise UnbuildableError(j{i})",
+        "distance = sqrt(sqr_distance)",
+        "if distance == 0:",
+        "    # Same circle",
+        f"    x{i}, y{i} = same_circle(j{i}, x{i}, y{i}, x{p0}, y{p0}, r{i}_0)",
+        "else:",
+        "    inv_distance = 1 / distance",
+        f"    mid_dist = (r{i}_sqr_diff + sqr_distance) * inv_distance * .5",
+        "    mid_ratio = mid_dist * inv_distance",
+        f"    projected_x, projected_y = x{p0} + mid_ratio * dist_x, y{p0} + mid_ratio * dist_y",
+        f"    if abs(r{i}_0 - distance) == r{i}_1:",
+        "        # Tangent circles",
+        f"        x{i}, y{i} = projected_x, projected_y",
+        "    else:",
+        f"        radicand = r{i}_sqr - mid_dist * mid_dist",
+        "        height = sqrt(radicand) * inv_distance if radicand > 0 else 0.",
+        "        height_x, height_y = height * dist_x, height * dist_y",
+        "        inter1_x, inter1_y = projected_x + height_y, projected_y - height_x",
+        "        inter2_x, inter2_y = projected_x - height_y, projected_y + height_x",
+        # Same choice as geometry.get_nearest_point, without building tuples
+        f"        if (x{i} != inter1_x or y{i} != inter1_y) and (x{i} != inter2_x or y{i} != inter2_y):",
+        f"            dist1_x, dist1_y = x{i} - inter1_x, y{i} - inter1_y",
+        f"            dist2_x, dist2_y = x{i} - inter2_x, y{i} - inter2_y",
+        "            if dist1_x * dist1_x + dist1_y * dist1_y < dist2_x * dist2_x + dist2_y * dist2_y:",
+        f"                x{i}, y{i} = inter1_x, inter1_y",
+        "            else:",
+        f"                x{i}, y{i} = inter2_x, inter2_y",
+    ]
+    return reads, invariants, body
+
+
+def _linear(joint, i, parents):
+    """Source lines to intersect a circle and a line for a linear joint.
+
+    :param Linear joint: The joint.
+    :param int i: Index of the joint.
+    :param tuple[int] parents: Index of the circle center, then of the two line points.
+    :returns: Lines reading the joint constraints, lines computing invariants
+        from them, and lines to run at each step.
+        None if the joint is not completely defined.
+    :rtype: tuple[list[str], list[str], list[str]] | None
+    """
+    p0, p1, p2 = parents
+    if None in parents:
+        return None
+    reads = [f"r{i} = j{i}.revolute_radius"]
+    body = [
+        "inter = circle_line_from_points_intersection("
+        f"(x{p0}, y{p0}, r{i}), (x{p1}, y{p1}), (x{p2}, y{p2}))",
+        "if len(inter) == 0:",
+        f"    raise UnbuildableError(j{i})",
+        "elif len(inter) == 1:",
+        f"    x{i}, y{i} = inter[0]",
+        "else:",
+        f"    x{i}, y{i} = get_nearest_point((x{i}, y{i}), inter[0], inter[1])",
+    ]
+    return reads, [], body
+
+
+_WRITERS = {Crank: _crank, Fixed: _fixed, Revolute: _revolute, Linear: _linear}
+
+
+def same_circle(joint, x, y, x_0, y_0, radius):
+    """Project a revolute joint on its circle when both circles are the same.
+
+    :param Revolute joint: The joint, for the warning message.
+    :param float x: Current abscissa of the joint.
+    :param float y: Current ordinate of the joint.
+    :param float x_0: Abscissa of the circle center.
+    :param float y_0: Ordinate of the circle center.
+    :param float radius: Radius of the circle.
+    :rtype: tuple[float, float]
+    """
+    warnings.warn(
+        f"Joint {joint.name} has an infinite number of"
+        "solutions, position will be arbitrary"
+    )
+    return pl_geom.cyl_to_cart(radius, math.atan2(y - y_0, x - x_0), (x_0, y_0))
+
+
+def generate_source(linkage, recorded=None):
+    """Source code of a simulation function specialized for a linkage.
+
+    The function has the signature ``simulate(nodes, iterations, dt, out)``,
+    where nodes are the joints given by :func:`batch.solving_plan`, and out
+    is an array of shape (iterations, 2 * n_recorded).
+    It returns False without doing anything if a coordinate or a constraint
+    is undefined.
+
+    :param linkage: Linkage to simulate.
+    :type linkage: pylinkage.linkage.Linkage
+    :param recorded: Indexes of the joints whose coordinates are written in out.
+        If None, all the joints of the linkage. (Default value = None)
+    :type recorded: tuple[int] | None
+
+    :returns: Source code defining the function simulate, None if a joint
+        has a custom reload method.
+    :rtype: str | None
+    """
+    nodes, steps = solving_plan(linkage)
+    n_joints = len(linkage.joints)
+    reads = [f"x{i}, y{i} = j{i}.x, j{i}.y" for i in range(len(nodes))]
+    invariants = []
+    # Joints placed once, before the loop
+    placed = []
+    body = []
+    moving = set()
+    for joint, i, parents, _ in steps:
+        # Subclasses are supported as long as they do not change the reload method
+        writers = [
+            writer for joint_type, writer in _WRITERS.items()
+            if type(joint).reload is joint_type.reload
+        ]
+        lines = writers[0](joint, i, parents) if writers else None
+        if lines is None:
+            return None
+        reads.extend(lines[0])
+        invariants.extend(lines[1])
+        # A fixed joint only depends on its parents, it does not move if they do not
+        if writers[0] is _fixed and moving.isdisjoint(parents):
+            section = placed
+        else:
+            section = body
+            moving.add(i)
+        section.append(f"# {type(joint).__name__} {joint.name!r}")
+        section.extend(lines[2])
+    variables = [line.split(" = ")[0] for line in reads]
+    solved = [i for _, i, _, _ in steps]
+    if recorded is None:
+        recorded = range(n_joints)
+    row = ", ".join(f"x{i}, y{i}" for i in recorded)
+    lines = [
+        "def simulate(nodes, iterations, dt, out):",
+        f"    {', '.join(f'j{i}' for i in range(len(nodes)))}, = nodes",
+        *(f"    {line}" for line in reads),
+        f"    if None in ({', '.join(variables)}, ):",
+        "        return False",
+        *(f"    {line}" for line in invariants),
+        "    try:",
+        *(f"        {line}" for line in placed),
+        "        for step in range(iterations):",
+        *(f"            {line}" for line in body),
+        f"            out[step] = ({row}, )",
+        "    finally:",
+        *(f"        j{i}.x, j{i}.y = x{i}, y{i}" for i in solved),
+        "    return True",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+# Attributes set by set_constraints, in the order of the flat constraints
+_CONSTRAINTS = {
+    Crank: ("r", ),
+    Fixed: ("r", "angle"),
+    Revolute: ("r0", "r1"),
+    Linear: ("revolute_radius", ),
+}
+
+
+def generate_setter_source(linkage):
+    """Source code of a function setting all the flat constraints of a linkage.
+
+    The function has the signature ``set_constraints(joints, constraints)``,
+    where joints are the joints of the linkage and constraints a sequence with
+    exactly one value per constraint. Like the set_constraints methods of the
+    joints, a null value leaves the constraint unchanged.
+
+    :param linkage: Linkage to set.
+    :type linkage: pylinkage.linkage.Linkage
+
+    :returns: Source code defining the function set_constraints, and the
+        number of constraints. None if a joint has a custom set_constraints method.
+    :rtype: tuple[str, int] | None
+    """
+    lines = []
+    n_constraints = 0
+    for i, joint in enumerate(linkage.joints):
+        size = len(joint.get_constraints())
+        if not size:
+            continue
+        names = [
+            names for joint_type, names in _CONSTRAINTS.items()
+            if type(joint).set_constraints is joint_type.set_constraints
+        ]
+        if not names or len(names[0]) != size:
+            return None
+        targets = ", ".join(f"j{i}.{name}" for name in names[0])
+        values = ", ".join(
+            f"c{n_constraints + k} or j{i}.{name}" for k, name in enumerate(names[0])
+        )
+        lines.append(f"    {targets} = {values}")
+        n_constraints += size
+    if not n_constraints:
+        return None
+    lines = [
+        "def set_constraints(joints, constraints):",
+        f"    {', '.join(f'j{i}' for i in range(len(linkage.joints)))}, = joints",
+        f"    {', '.join(f'c{k}' for k in range(n_constraints))}, = constraints",
+        *lines,
+    ]
+    return "\n".join(lines) + "\n", n_constraints
+
+
+@functools.lru_cache(maxsize=None)
+def coordinates_setter(n_joints):
+    """Function setting the coordinates of a given number of joints.
+
+    The function has the signature ``set_coords(joints, coords)``, where coords
+    is a sequence of exactly one (x, y) pair per joint.
+
+    :param n_joints: Number of joints.
+    :type n_joints: int
+
+    :rtype: Callable
+    """
+    lines = [
+        "def set_coords(joints, coords):",
+        f"    {', '.join(f'j{i}' for i in range(n_joints))}, = joints",
+        f"    {', '.join(f'(x{i}, y{i})' for i in range(n_joints))}, = coords",
+        *(f"    j{i}.x, j{i}.y = x{i}, y{i}" for i in range(n_joints)),
+    ]
+    return build("\n".join(lines) + "\n", "set_coords")
+
+
+@functools.lru_cache(maxsize=None)
+def build(source, name="simulate"):
+    """Compile the source code of a generated function.
+
+    Functions are cached by source code, each process compiles them only once.
+
+    :param source: Source code given by :func:`generate_source` or
+        :func:`generate_setter_source`.
+    :type source: str
+    :param name: Name of the function defined by the source.
+        (Default value = "simulate")
+    :type name: str
+
+    :rtype: Callable
+    """
+    namespace = {
+        "atan2": math.atan2,
+        "cos": math.cos,
+        "sin": math.sin,
+        "sqrt": math.sqrt,
+        "circle_line_from_points_intersection": pl_geom.circle_line_from_points_intersection,
+        "get_nearest_point": pl_geom.core.get_nearest_point,
+        "same_circle": same_circle,
+        "UnbuildableError": UnbuildableError,
+    }
+    exec(compile(source, "<pylinkage simulation>", "exec"), namespace)
+    return namespace[name]
@@ -8,9 +8,14 @@ Created on Fri Apr 16, 16:39:21 2021.
 @author: HugoFara
 """
 import warnings
+from functools import partial
 from math import gcd, tau
+
+import numpy as np
+
 from ..exceptions import HypostaticError
 from ..joints import (Revolute, Fixed, Crank, Static)
+from . import batch, compiler
 
 
 class Linkage:
@@ -22,7 +27,10 @@ class Linkage:
 
     """
 
-    __slots__ = "name", "joints", "_cranks", "_solve_order"
+    __slots__ = (
+        "name", "joints", "_cranks", "_solve_order", "_rotation_period",
+        "_constraint_slots", "_batch_plan", "_compiled", "_constraint_setter"
+    )
 
     def __init__(self, joints, order=None, name=None):
         """
@@ -44,7 +52,25 @@ class Linkage:
         if name is None:
             self.name = str(id(self))
         self.joints = tuple(joints)
-        self._cranks = tuple(j for j in joints if isinstance(j, Crank))
+        self._cranks = tuple(j for j in self.joints if isinstance(j, Crank))
+        # Crank angles and the rotation period computed for them
+        self._rotation_period = None
+        # Constraints setter of each joint, with its slice of flat constraints
+        self._constraint_slots = []
+        start = 0
+        for joint in self.joints:
+            stop = start + len(joint.get_constraints())
+            if stop > start:
+                self._constraint_slots.append((joint.set_constraints, start, stop))
+            start = stop
+        self._constraint_slots = tuple(self._constraint_slots)
+        # Solving order and the batch simulation plan computed for it
+        self._batch_plan = None
+        # Solving order and the sources of the simulations compiled for it,
+        # by recorded joints
+        self._compiled = None
+        # Source of the compiled constraints setter, and number of constraints
+        self._constraint_setter = None
         if order:
             self._solve_order = tuple(order)
 
@@ -109,11 +135,20 @@ class Linkage:
     def set_coords(self, coords):
         """Set coordinates for all joints of the linkage.
 
-        :param coords: 
+        :param coords: Coordinates of each joint, in the order of self.joints.
+        :type coords: Iterable[tuple[float, float]] | numpy.ndarray
 
         """
+        # Python floats are faster than numpy scalars in the joints
+        if isinstance(coords, np.ndarray):
+            coords = coords.tolist()
+        elif not isinstance(coords, (list, tuple)):
+            coords = tuple(coords)
+        if self.joints and len(coords) == len(self.joints):
+            compiler.coordinates_setter(len(self.joints))(self.joints, coords)
+            return
         for joint, coord in zip(self.joints, coords):
-            joint.set_coord(coord)
+            joint.x, joint.y = coord
 
     def hyperstaticity(self):
         """Return the hyperstaticity (over-constrainment) degree of the linkage in 2D."""
@@ -160,13 +195,139 @@ class Linkage:
         """
         if iterations is None:
             iterations = self.get_rotation_period()
+        reloaders = self._reloaders(dt)
+        joints = self.joints
         for _ in range(iterations):
-            for j in self._solve_order:
-                if isinstance(j, Crank):
-                    j.reload(dt)
-                else:
-                    j.reload()
-            yield tuple(j.coord() for j in self.joints)
+            for reload in reloaders:
+                reload()
+            yield tuple([j.coord() for j in joints])
+
+    def step_array(self, iterations=None, dt=1, out=None, joints=None):
+        """Make steps of the linkage, writing coordinates in an array.
+
+        Same simulation as :meth:`step`, without building a tuple at each
+        iteration. Passing the same out array for each simulation avoids
+        any allocation. Call :meth:`compile` first for a faster simulation.
+
+        :param iterations: Number of iterations to run across.
+            If None, it is len(out), or self.get_rotation_period() without out.
+            (Default value = None)
+        :type iterations: int | None
+        :param dt: Amount of rotation to turn the cranks by.
+            (Default value = 1)
+        :type dt: float
+        :param out: C-contiguous array of shape (iterations, n_recorded, 2)
+            to write the coordinates in. If None, a new array is created.
+            (Default value = None)
+        :type out: numpy.ndarray | None
+        :param joints: Indexes in self.joints of the joints to record.
+            All the joints are simulated, but only these ones are written.
+            If None, all the joints are recorded. (Default value = None)
+        :type joints: Sequence[int] | None
+
+        :returns: Coordinates of the recorded joints, shape (iterations, n_recorded, 2).
+        :rtype: numpy.ndarray
+        """
+        if joints is not None:
+            joints = tuple(joints)
+        if iterations is None:
+            iterations = self.get_rotation_period() if out is None else len(out)
+        if out is None:
+            out = np.empty((iterations, len(self.joints if joints is None else joints), 2))
+        # Raises an error instead of copying non-contiguous data
+        flat = out.view()
+        flat.shape = len(out), -1
+        if self._compiled is not None and self._compiled[0] is self._solve_order:
+            sources = self._compiled[1]
+            if joints not in sources:
+                sources[joints] = compiler.generate_source(self, joints)
+            simulate = compiler.build(sources[joints])
+            if simulate(batch.solving_plan(self)[0], iterations, dt, flat):
+                return out
+        reloaders = self._reloaders(dt)
+        if joints is None:
+            joints = self.joints
+        else:
+            joints = tuple(self.joints[i] for i in joints)
+        for i in range(iterations):
+            for reload in reloaders:
+                reload()
+            flat[i] = [value for j in joints for value in (j.x, j.y)]
+        return out
+
+    def compile(self):
+        """Generate a simulation function specialized for this linkage.
+
+        The joints are solved with straight-line code, without calling
+        their reload methods, which makes :meth:`step_array` faster.
+        The function is generated again if the solving order changes,
+        and it falls back to the generic simulation when some coordinates or
+        constraints are undefined.
+
+        :returns: True if the linkage could be compiled. Joints defining their own
+            reload method cannot.
+        :rtype: bool
+        """
+        if not hasattr(self, '_solve_order'):
+            self.__find_solving_order__()
+        self._constraint_setter = compiler.generate_setter_source(self)
+        source = compiler.generate_source(self)
+        if source is None:
+            return False
+        self._compiled = self._solve_order, {None: source}
+        return True
+
+    def _reloaders(self, dt):
+        """Reload method of each joint, in solving order.
+
+        Joint types are resolved once, not at each iteration.
+
+        :param dt: Amount of rotation to turn the cranks by.
+        :type dt: float
+
+        :rtype: tuple[Callable]
+        """
+        return tuple(
+            partial(j.reload, dt) if isinstance(j, Crank) else j.reload
+            for j in self._solve_order
+        )
+
+    def step_batch(
+            self, constraints, positions=None, iterations=None, dt=1, dtype=float, joints=None
+    ):
+        """Simulate several sets of constraints at once.
+
+        Each joint is solved for all the sets with a single numpy operation.
+        The linkage itself is not modified.
+
+        :param constraints: One set of flat constraints per row,
+            in the format of :meth:`get_num_constraints`.
+        :type constraints: numpy.ndarray
+        :param positions: Initial coordinates, shared by all sets (n_joints, 2),
+            or for each set (n_sets, n_joints, 2).
+            If None, the current coordinates are used.
+            (Default value = None)
+        :type positions: numpy.ndarray | tuple[tuple[float, float]] | None
+        :param iterations: Number of iterations to run across.
+            If None, the default is self.get_rotation_period().
+            (Default value = None)
+        :type iterations: int | None
+        :param dt: Amount of rotation to turn the cranks by.
+            (Default value = 1)
+        :type dt: float
+        :param dtype: Floating type of the computations.
+            numpy.float32 is faster on large batches, but less precise.
+            (Default value = float)
+        :type dtype: type
+        :param joints: Indexes in self.joints of the joints to record.
+            If None, all the joints are recorded. (Default value = None)
+        :type joints: Sequence[int] | None
+
+        :returns: Coordinates of shape (iterations, n_sets, n_recorded, 2).
+            Sets that cannot be built have NaN coordinates.
+        :rtype: numpy.ndarray
+        """
+        return batch.step_batch(self, constraints, positions, iterations, dt, dtype, joints)
 
     def get_num_constraints(self, flat=True):
         """Numeric constraints of this linkage.
@@ -201,15 +362,17 @@ class Linkage:
         :type flat: bool
         """
         if flat:
-            # Is in charge of redistributing constraints
-            dispatcher = iter(constraints)
-            for joint in self.joints:
-                if isinstance(joint, Static):
-                    pass
-                elif isinstance(joint, Crank):
-                    joint.set_constraints(next(dispatcher))
-                elif isinstance(joint, (Fixed, Revolute)):
-                    joint.set_constraints(next(dispatcher), next(dispatcher))
+            # Python floats are faster than numpy scalars in the joints
+            if isinstance(constraints, np.ndarray):
+                constraints = constraints.tolist()
+            else:
+                constraints = tuple(constraints)
+            setter = self._constraint_setter
+            if setter is not None and len(constraints) == setter[1]:
+                compiler.build(setter[0], "set_constraints")(self.joints, constraints)
+                return
+            for set_constraints, start, stop in self._constraint_slots:
+                set_constraints(*constraints[start:stop])
         else:
             for joint, constraint in zip(self.joints, constraints):
                 joint.set_constraints(*constraint)
@@ -220,14 +383,19 @@ class Linkage:
         Formally, it is the common denominator of all crank periods.
 
 
+        The result is cached until a crank angle changes.
+
         :returns: Number of iterations with dt=1.
         :rtype: int
         """
+        angles = tuple(j.angle for j in self._cranks)
+        if self._rotation_period is not None and self._rotation_period[0] == angles:
+            return self._rotation_period[1]
         periods = 1
-        for j in self.joints:
-            if isinstance(j, Crank):
-                freq = round(tau / abs(j.angle))
-                periods = periods * freq // gcd(periods, freq)
+        for angle in angles:
+            freq = round(tau / abs(angle))
+            periods = periods * freq // gcd(periods, freq)
+        self._rotation_period = angles, periods
         return periods
 
     def set_completely(self, dimensions, positions, flat=True):
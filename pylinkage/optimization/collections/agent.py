@@ -8,4 +8,5 @@ class Agent(namedtuple("Agent", ["score", "dimensions", "init_positions"])):
 
 
     """
-    pass
+    # No instance dictionary, as light as the namedtuple
+    __slots__ = ()
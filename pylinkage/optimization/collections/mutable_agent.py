@@ -5,6 +5,8 @@ class MutableAgent:
 
 
     """
+    __slots__ = ("score", "dimensions", "init_positions")
+
     score: float
     dimensions: tuple
     init_positions: tuple
@@ -6,9 +6,10 @@ will almost certainly be too big.
 """
 import math
 import itertools
+import multiprocessing
 import numpy as np
 import tqdm
-from .utils import generate_bounds
+from .utils import generate_bounds, _init_worker, _worker_eval
 from .collections import MutableAgent
 
 
@@ -129,6 +130,10 @@ def trials_and_errors_optimization(
         - verbose : The number of combinations will be printed in console if `True`.
             (Default value = True).
         - sequential : If True, two consecutive linkages will have a small variation.
+        - n_processes : Number of processes evaluating the dimensions.
+            eval_func should be picklable (defined at module level).
+            The results are the same as with a single process.
+            (Default value = None, evaluations in the current process).
 
     :type kwargs: dict
 
@@ -150,6 +155,8 @@ def trials_and_errors_optimization(
     # scores will be in decreasing order
     results = [MutableAgent() for _ in range(n_results)]
     prev = [i.coord() for i in linkage.joints]
+    # Faster simulations for the whole optimization
+    linkage.compile()
     # We start by a "fall": we do not want to break the system by modifying
     # dimensions, so we assess it is normally behaving, and we change
     # dimensions progressively to minimal dimensions.
@@ -166,27 +173,50 @@ def trials_and_errors_optimization(
     else:
         order_relation = max
     verbose = 'verbose' in kwargs and kwargs['verbose']
+    n_processes = kwargs.get('n_processes')
+    pool = None
+    if n_processes is not None and n_processes > 1:
+        pool = multiprocessing.Pool(
+            n_processes, initializer=_init_worker, initargs=(eval_func, linkage, prev)
+        )
+
+    def evaluations():
+        """Each dimension set with its score, in the order of variations_generator."""
+        if pool is None:
+            for dim in variations_generator:
+                yield dim, eval_func(linkage, dim, prev)
+            return
+        # Batches keep memory bounded, the grid may be huge
+        batch_size = n_processes * 256
+        batch = list(itertools.islice(variations_generator, batch_size))
+        while batch:
+            yield from zip(batch, pool.map(_worker_eval, batch))
+            batch = list(itertools.islice(variations_generator, batch_size))
+
     # Iterable of all possible dimensions
     pbar = tqdm.tqdm(
-        variations_generator,
+        evaluations(),
         desc='Trials and errors optimization',
         total=divisions ** len(center),
         postfix=postfix,
         disable=not verbose
     )
-    for dim in pbar:
-        # Check performances
-        new_score = eval_func(linkage, dim, prev)
-        for result in results:
-            if result.score is None or order_relation(result.score, new_score) != result.score:
-                result[:] = new_score, dim.copy(), prev.copy()
-                if verbose:
-                    postfix.update({
-                        "best score": results[0][0],
-                        "best dimensions": results[0][1]
-                    })
-                    pbar.set_postfix(postfix)
-                break
+    try:
+        for dim, new_score in pbar:
+            for result in results:
+                if result.score is None or order_relation(result.score, new_score) != result.score:
+                    result[:] = new_score, dim.copy(), prev.copy()
+                    if verbose:
+                        postfix.update({
+                            "best score": results[0][0],
+                            "best dimensions": results[0][1]
+                        })
+                        pbar.set_postfix(postfix)
+                    break
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
     if verbose:
         print(
             "Trials and errors optimization finished. "
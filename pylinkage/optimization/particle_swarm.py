@@ -5,8 +5,52 @@ Created on Fri Mar 8, 13:51:45 2019.
 
 @author: HugoFara
 """
-from pyswarms.single.local_best import LocalBestPSO
+import multiprocessing
+import queue
+import warnings
+
+import numpy as np
+import tqdm
 from .collections import Agent
+from .utils import _init_worker, _worker_eval
+
+
+def local_best(positions, best_positions, best_costs, neighbors, particles=slice(None)):
+    """Best known position in the neighborhood of each particle.
+
+    The neighborhood of a particle are its k nearest particles
+    (itself included), using the Manhattan distance.
+
+    :param positions: Current positions, shape (n_particles, dimensions).
+    :type positions: numpy.ndarray
+    :param best_positions: Best position of each particle.
+    :type best_positions: numpy.ndarray
+    :param best_costs: Cost at the best position of each particle.
+    :type best_costs: numpy.ndarray
+    :param neighbors: Number of particles in each neighborhood.
+    :type neighbors: int
+    :param particles: Particles whose neighborhood should be searched.
+        (Default value = slice(None), the whole swarm)
+    :type particles: slice | list[int]
+
+    :returns: Best position for each neighborhood, shape (len(particles), dimensions).
+    :rtype: numpy.ndarray
+    """
+    current = positions[particles]
+    # Accumulated one dimension at a time: a reduction along the short last
+    # axis of a (particles, n_particles, dimensions) array is much slower
+    distances = np.zeros((len(current), len(positions)))
+    gap = np.empty_like(distances)
+    for coordinates, all_coordinates in zip(current.T, positions.T):
+        np.subtract(coordinates[:, np.newaxis], all_coordinates, out=gap)
+        np.abs(gap, out=gap)
+        distances += gap
+    neighborhoods = np.argpartition(distances, neighbors - 1, axis=1)[:, :neighbors]
+    best_neighbors = neighborhoods[
+        np.arange(len(distances)),
+        np.argmin(best_costs[neighborhoods], axis=1)
+    ]
+    return best_positions[best_neighbors]
 
 
 def particle_swarm_optimization(
@@ -20,12 +64,17 @@ def particle_swarm_optimization(
         bounds=None,
         order_relation=max,
         verbose=True,
+        n_processes=None,
+        vectorized=False,
+        asynchronous=False,
         **kwargs
 ):
-    """Particle Swarm Optimization wrapper for pyswarms.
-    
-    This function is a simple wrapper to optimize a linkage using PSO. It will
-    mainly call the LocalBestPSO function from pyswarms.single.
+    """Particle Swarm Optimization of a linkage, with a local best topology.
+
+    At each iteration, the velocities of all the particles are updated at once:
+    v = inertia * v + leader * r1 * (best - x) + follower * r2 * (local_best - x),
+    where r1 and r2 are random, best is the best position of the particle and
+    local_best the best position among its neighbors.
 
     :param eval_func: The evaluation function.
         Input: (linkage, num_constraints, initial_coordinates).
@@ -35,8 +84,10 @@ def particle_swarm_optimization(
     :param linkage: Linkage to be optimized. Make sure to give an optimized linkage for
         better results
     :type linkage: pylinkage.linkage.Linkage
-    :param center: A list of initial dimensions. If None, dimensions will be generated
-        randomly between bounds. The default is None.
+    :param center: A list of initial dimensions.
+        If set, the first particle starts at this position.
+        Without bounds, particles are generated randomly between 0 and center.
+        The default is None.
     :type center: list
     :param dimensions: Number of dimensions of the swarm space, number of parameters.
         If None, it takes the value len(tuple(linkage.get_num_constraints())).
@@ -44,18 +95,21 @@ def particle_swarm_optimization(
     :type dimensions: int
     :param n_particles: Number of particles in the swarm. The default is 100.
     :type n_particles: float
-    :param inertia: Inertia of each particle, w in pyswarms. The default is .3.
+    :param inertia: Inertia of each particle, w in the literature. The default is .6.
     :type inertia: float
-    :param leader: Learning coefficient of each particle, c1 in pyswarms.
-        The default is .2.
+    :param leader: Learning coefficient of each particle, c1 in the literature.
+        The default is 3.
     :type leader: float
-    :param follower: Social coefficient, c2 in pyswarms. The default is .5.
+    :param follower: Social coefficient, c2 in the literature. The default is .1.
     :type follower: float
     :param neighbors: Number of neighbors to consider. The default is 17.
     :type neighbors: int
     :param iters: Number of iterations to describe. The default is 200.
     :type iters: int
-    :param bounds: Bounds to the space, in format (lower_bound, upper_bound). (Default value = None)
+    :param bounds: Bounds to the space, in format (lower_bound, upper_bound).
+        Particles are generated between bounds, a particle leaving the space
+        comes back from the other side.
+        (Default value = None)
     :type bounds: sequence of two list of float
     :param order_relation: How to compare scores.
         There should not be anything else than the built-in
@@ -65,46 +119,174 @@ def particle_swarm_optimization(
     :param verbose: The optimization state will be printed in the console if True.
         (Default value = True).
     :type verbose: bool
-    :param kwargs: keyword arguments to pass to pyswarm.local.single.LocalBestPSO.
+    :param n_processes: Number of processes used to evaluate the particles.
+        The pool is created once for the whole optimization, and each worker
+        holds its own copy of the linkage.
+        eval_func should be picklable (defined at module level).
+        If None or 1, particles are evaluated in the current process.
+        (Default value = None).
+    :type n_processes: int | None
+    :param vectorized: If True, eval_func evaluates the whole swarm at once.
+        Its second argument is then an array of shape (n_particles, dimensions),
+        and it should return one score per particle.
+        With n_processes, each worker evaluates a slice of the swarm.
+        (Default value = False).
+    :type vectorized: bool
+    :param asynchronous: If True, each particle moves as soon as its own evaluation
+        is done, using the best positions known at that time, and is evaluated
+        again right away. Processes never wait for the slowest particle of an
+        iteration, which helps when evaluations are long and their duration
+        varies a lot. For fast evaluations, the synchronous version has less overhead.
+        An iteration still counts n_particles evaluations.
+        (Default value = False).
+    :type asynchronous: bool
+    :param kwargs: Unused, they used to be passed to pyswarms.
     :type kwargs: dict
 
     :returns: List of Agents: best score, best dimensions and initial positions.
     :rtype: List[Agent]
     """
+    if kwargs:
+        warnings.warn(
+            f"Unused arguments {tuple(kwargs)}, "
+            "pylinkage does not rely on pyswarms anymore."
+        )
     if dimensions is None:
         dimensions = len(tuple(linkage.get_num_constraints()))
-    options = {
-        'c1': leader,
-        'c2': follower,
-        'w': inertia,
-        'k': neighbors,
-        'p': 1,
-    }
+    neighbors = min(neighbors, n_particles)
     joint_pos = tuple(j.coord() for j in linkage.joints)
-    optimizer = LocalBestPSO(
-        n_particles=n_particles,
-        dimensions=dimensions,
-        options=options,
-        bounds=bounds,
-        center=center if center is not None else 1.0,
-        **kwargs
-    )
-    # vectorized_eval_func=np.vectorize(eval_func, signature='(n),(m,k)->()')
+    # Faster simulations for the whole optimization
+    linkage.compile()
+
+    # Swarm initialization
+    if bounds is None:
+        positions = np.random.rand(n_particles, dimensions)
+        if center is not None:
+            positions *= center
+    else:
+        bounds = np.asarray(bounds[0], dtype=float), np.asarray(bounds[1], dtype=float)
+        positions = np.random.uniform(*bounds, size=(n_particles, dimensions))
+        span = bounds[1] - bounds[0]
+    if center is not None:
+        positions[0] = center
+    velocities = np.random.rand(n_particles, dimensions)
+    best_positions = positions.copy()
+    best_costs = np.full(n_particles, np.inf)
+
+    pool = None
+    if n_processes is not None and n_processes > 1:
+        # Starting processes is expensive, do it only once
+        pool = multiprocessing.Pool(
+            n_processes,
+            initializer=_init_worker,
+            initargs=(eval_func, linkage, joint_pos)
+        )
+
+    # The swarm minimizes costs
+    sign = -1 if order_relation is max else 1
 
     def eval_wrapper(dims):
-        """Wrapper for the evaluation function since PySwarms is too rigid.
+        """Costs of the particles.
 
-        :param dims: 
+        :param dims: Dimensions of each particle of the swarm.
 
         """
-        if order_relation is max:
-            return [-eval_func(linkage, d, joint_pos) for d in dims]
-        elif order_relation is min:
-            return [eval_func(linkage, d, joint_pos) for d in dims]
-
-    score, constraints = optimizer.optimize(
-        eval_wrapper,
-        iters,
-        verbose=verbose
+        if pool is None:
+            if vectorized:
+                scores = eval_func(linkage, dims, joint_pos)
+            else:
+                scores = [eval_func(linkage, d, joint_pos) for d in dims]
+        elif vectorized:
+            # No empty slice when there are fewer particles than processes
+            scores = np.concatenate(
+                pool.map(_worker_eval, np.array_split(dims, min(n_processes, len(dims))))
+            )
+        else:
+            scores = pool.map(
+                _worker_eval, dims, chunksize=-(-len(dims) // n_processes)
+            )
+        return sign * np.asarray(scores, dtype=float)
+
+    def move(particles):
+        """Update the velocities and positions of some particles.
+
+        :param particles: Indexes of the particles to move.
+        :type particles: slice | list[int]
+        """
+        current = positions[particles]
+        local_best_positions = local_best(
+            positions, best_positions, best_costs, neighbors, particles
+        )
+        cognitive, social = np.random.rand(2, *current.shape)
+        velocity = velocities[particles]
+        velocity *= inertia
+        velocity += leader * cognitive * (best_positions[particles] - current)
+        velocity += follower * social * (local_best_positions - current)
+        current += velocity
+        if bounds is not None:
+            # Periodic boundaries: a particle leaving the space comes back on the other side
+            current -= bounds[0]
+            np.mod(current, span, out=current, where=span > 0)
+            current[:, span <= 0] = 0
+            current += bounds[0]
+        # No-op for a slice, copy back for a list of indexes
+        velocities[particles] = velocity
+        positions[particles] = current
+
+    pbar = tqdm.trange(
+        iters, desc='Particle swarm optimization', disable=not verbose
     )
-    return [Agent(score, constraints, joint_pos)]
+    try:
+        if not asynchronous:
+            for _ in pbar:
+                # Positions are updated in place, eval_func may keep a reference
+                costs = eval_wrapper(positions.copy())
+                improved = costs < best_costs
+                best_costs[improved] = costs[improved]
+                best_positions[improved] = positions[improved]
+                move(slice(None))
+                if verbose:
+                    pbar.set_postfix({"best cost": best_costs.min()})
+        else:
+            # Particle index and score, in the order evaluations finish
+            done = queue.SimpleQueue()
+
+            def submit(k):
+                """Start the evaluation of the particle k at its current position."""
+                dims = positions[k:k + 1].copy() if vectorized else positions[k].copy()
+                if pool is None:
+                    done.put((k, eval_func(linkage, dims, joint_pos)))
+                else:
+                    pool.apply_async(
+                        _worker_eval, (dims, ),
+                        callback=lambda score: done.put((k, score)),
+                        error_callback=lambda error: done.put((k, error))
+                    )
+
+            for k in range(n_particles):
+                submit(k)
+            submitted = n_particles
+            # Each iteration counts n_particles evaluations
+            for _ in pbar:
+                for _ in range(n_particles):
+                    k, score = done.get()
+                    if isinstance(score, BaseException):
+                        raise score
+                    cost = sign * float(np.ravel(score)[0])
+                    if cost < best_costs[k]:
+                        best_costs[k] = cost
+                        best_positions[k] = positions[k]
+                    move([k])
+                    if submitted < iters * n_particles:
+                        submit(k)
+                        submitted += 1
+                if verbose:
+                    pbar.set_postfix({"best cost": best_costs.min()})
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    best = np.argmin(best_costs)
+    score = -best_costs[best] if order_relation is max else best_costs[best]
+    return [Agent(score, best_positions[best], joint_pos)]
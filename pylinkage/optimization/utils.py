@@ -9,6 +9,38 @@ import numpy as np
 
 from ..linkage.analysis import kinematic_default_test
 
+# Evaluation context of a worker process, set once by _init_worker
+_WORKER_CONTEXT = None
+
+
+def _init_worker(eval_func, linkage, joint_pos):
+    """Store the evaluation context in a worker process.
+
+    Each worker receives its own copy of the linkage only once, at pool creation.
+
+    :param eval_func: The evaluation function.
+    :type eval_func: Callable -> float
+    :param linkage: Linkage to be optimized, copied in the worker.
+    :type linkage: pylinkage.linkage.Linkage
+    :param joint_pos: Initial positions of the joints.
+    :type joint_pos: tuple[tuple[float, float]]
+    """
+    global _WORKER_CONTEXT
+    _WORKER_CONTEXT = eval_func, linkage, joint_pos
+
+
+def _worker_eval(dims):
+    """Evaluate a set of dimensions, or a batch of sets, in a worker process.
+
+    :param dims: Dimensions to evaluate, one set per row for a vectorized function.
+    :type dims: list[float] | numpy.ndarray
+
+    :returns: Score given by the evaluation function.
+    :rtype: float | numpy.ndarray
+    """
+    eval_func, linkage, joint_pos = _WORKER_CONTEXT
+    return eval_func(linkage, dims, joint_pos)
+
 
 def generate_bounds(center, min_ratio=5, max_factor=5):
     """Simple function to generate bounds from a linkage.
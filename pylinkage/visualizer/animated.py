@@ -7,11 +7,13 @@ Created on Mon Jun 14, 12:13:58 2021.
 
 @author: HugoFara
 """
+import math
+
 import matplotlib.pyplot as plt
 import matplotlib.animation as anim
+import numpy as np
 
 from ..linkage.analysis import movement_bounding_box
-from ..exceptions import UnbuildableError
 from ..joints import Crank, Static
 from .static import plot_static_linkage
 from .core import _get_color
@@ -167,10 +169,9 @@ def show_linkage(
 
     linkage_bb = movement_bounding_box(loci)
     # We introduce a relative padding of 20%
-    padding = (
-        (linkage_bb[2] - linkage_bb[0]) ** 2
-        + (linkage_bb[3] - linkage_bb[1]) ** 2
-    ) ** .5 * .2
+    padding = math.hypot(
+        linkage_bb[2] - linkage_bb[0], linkage_bb[3] - linkage_bb[1]
+    ) * .2
     for axis in (ax1, ax2):
         axis.set_xlim(linkage_bb[3] - padding, linkage_bb[1] + padding)
         axis.set_ylim(linkage_bb[0] - padding, linkage_bb[2] + padding)
@@ -200,6 +201,9 @@ def swarm_tiled_repr(
 ):
     """Show all the linkages in a swarm in tiled mode.
 
+    The agents are simulated together with :meth:`Linkage.step_batch`,
+    linkages that cannot be built are not drawn.
+
     :param linkage: The original Linkage that will be MODIFIED.
     :type linkage: pylinkage.linkage.Linkage
     :param swarm: Sequence of list of 3 elements: for each iteration, for each agent, (score, dimensions and initial
@@ -221,24 +225,25 @@ def swarm_tiled_repr(
 
     """
     fig.suptitle("Iteration: {}, best score: {}".format(swarm[0], max(agent[0] for agent in swarm[1])))
-    for i, agent in enumerate(swarm[1]):
-        dimensions = agent[1]
-        if dimension_func is None:
-            linkage.set_num_constraints(dimensions)
-        else:
-            linkage.set_num_constraints(dimension_func(dimensions))
-        linkage.set_coords(agent[2])
-        try:
-            loci = tuple(
-                map(
-                    tuple,
-                    linkage.step(
-                        iterations=points * iteration_factor,
-                        dt=1 / iteration_factor
-                    )
-                )
-            )
-        except UnbuildableError:
+    if dimension_func is None:
+        dimensions = [agent[1] for agent in swarm[1]]
+    else:
+        dimensions = [dimension_func(agent[1]) for agent in swarm[1]]
+    # All the agents are simulated at once, shape (n_agents, iterations, n_joints, 2)
+    loci = np.swapaxes(
+        linkage.step_batch(
+            np.array(dimensions, dtype=float),
+            np.array([agent[2] for agent in swarm[1]], dtype=float),
+            iterations=points * iteration_factor,
+            dt=1 / iteration_factor
+        ),
+        0, 1
+    )
+    flat_axes = axes.flatten()
+    for i, agent_loci in enumerate(loci):
+        # Unbuildable linkage
+        if np.isnan(agent_loci).any():
             continue
-        axes.flatten()[i].clear()
-        plot_static_linkage(linkage, axes.flatten()[i], loci)
+        linkage.set_coords(agent_loci[-1])
+        flat_axes[i].clear()
+        plot_static_linkage(linkage, flat_axes[i], agent_loci)
@@ -9,7 +9,15 @@ Created on Thu Apr 15, 13:26:42 2021
 import unittest
 import numpy as np
 
-from pylinkage.geometry import circle_intersect, circle_line_intersection, sqr_dist
+from pylinkage.geometry import (
+    circle_intersect, circle_intersect_batch, circle_line_intersection, sqr_dist, intersection,
+    cyl_to_cart, cyl_to_cart_origin, batch_cyl_to_cart, Circle, Point, pairwise_sqr_dist,
+    sqr_dist_batch
+)
+from pylinkage.geometry import (
+    circle_line_from_points_intersection, circle_line_from_points_intersection_batch
+)
+from pylinkage.geometry.secants import secant_circles_intersections
 
 
 class TestCircles(unittest.TestCase):
@@ -30,6 +38,97 @@ class TestCircles(unittest.TestCase):
         inter = circle_intersect(c1, c2)
         self.assertEqual(0, inter[0])
 
+    def test_near_tangent(self):
+        """Rounding errors near tangency should not raise an error."""
+        # Circles tangent up to rounding errors
+        inter = circle_intersect(
+            (0, 0, 1.61972308966473),
+            (1.6730998292164985, -1.1957147447670355, 3.6761755664746305)
+        )
+        self.assertIn(inter[0], (1, 2))
+        inter = circle_intersect(
+            (0, 0, 0.49418451090742355),
+            (-1.172079191531321, -0.06856662267357974, 1.6682675628954744)
+        )
+        self.assertIn(inter[0], (1, 2))
+
+    def test_secant_circles_intersections(self):
+        """The helper returns the type, then one tuple per point."""
+        # Circles (0, 0, 1.5) and (2, 0, 1.5)
+        inter = secant_circles_intersections(2., 2., 0., 1., 1.5, (1., 0.))
+        self.assertEqual(3, len(inter))
+        self.assertEqual(2, inter[0])
+        np.testing.assert_allclose((1, -np.sqrt(1.25)), inter[1])
+        np.testing.assert_allclose((1, np.sqrt(1.25)), inter[2])
+        np.testing.assert_allclose(circle_intersect((0, 0, 1.5), (2, 0, 1.5))[1:], inter[1:])
+
+    def test_named_circles(self):
+        """Named tuples are accepted as circles."""
+        circle1, circle2 = Circle(0, 0, 2), Circle(3, 0, 2)
+        self.assertEqual(circle_intersect((0, 0, 2), (3, 0, 2)), circle_intersect(circle1, circle2))
+        self.assertEqual(2, circle2.r)
+        self.assertEqual(4, sqr_dist(Point(0, 0), Point(x=0, y=2)))
+
+    def test_batch(self):
+        """Batch intersections should match circle_intersect."""
+        circles1 = np.random.rand(200, 3) * 4
+        circles2 = np.random.rand(200, 3) * 4
+        # Same circles, then tangent circles
+        circles2[0] = circles1[0]
+        circles1[1], circles2[1] = (0, 0, 2), (3, 0, 1)
+        kinds, intersections = circle_intersect_batch(circles1, circles2)
+        for c1, c2, kind, points in zip(circles1, circles2, kinds, intersections):
+            inter = circle_intersect(tuple(c1), tuple(c2))
+            self.assertEqual(inter[0], kind)
+            if kind in (1, 2):
+                np.testing.assert_allclose(points[kind - 1], inter[kind])
+            else:
+                self.assertTrue(np.isnan(points).all())
+        self.assertEqual(3, kinds[0])
+        self.assertEqual(1, kinds[1])
+
+    def test_batch_dtype(self):
+        """Batch intersections should keep single precision."""
+        circles1 = np.array([[0, 0, 2], [0, 0, 1]], dtype=np.float32)
+        circles2 = np.array([[1, 0, 2], [5, 0, 1]], dtype=np.float32)
+        kinds, intersections = circle_intersect_batch(circles1, circles2)
+        self.assertEqual(np.float32, intersections.dtype)
+        np.testing.assert_array_equal([2, 0], kinds)
+        np.testing.assert_allclose([.5, -np.sqrt(3.75)], intersections[0, 0], rtol=1e-6)
+
+    def test_batch_out(self):
+        """Batch intersections can be written in a preallocated array."""
+        circles1 = np.array([[0, 0, 2], [0, 0, 1]])
+        circles2 = np.array([[1, 0, 2], [5, 0, 1]])
+        out = np.empty((2, 2, 2))
+        kinds, intersections = circle_intersect_batch(circles1, circles2, out=out)
+        self.assertIs(out, intersections)
+        self.assertEqual(np.int8, kinds.dtype)
+        np.testing.assert_allclose([.5, np.sqrt(3.75)], out[0, 1])
+
+
+class TestIntersection(unittest.TestCase):
+    """Intersections of points and circles."""
+
+    def test_points(self):
+        """Two points intersect if they are closer than the tolerance."""
+        self.assertEqual((0, 0), intersection((0, 0), (0, 0)))
+        self.assertIsNone(intersection((0, 0), (.3, .4)))
+        self.assertIsNone(intersection((0, 0), (.3, .4), tol=.4))
+        self.assertEqual((0, 0), intersection((0, 0), (.3, .4), tol=.6))
+
+    def test_point_circle(self):
+        """A point intersects a circle within the tolerance."""
+        self.assertEqual((3, 4), intersection((3, 4), (0, 0, 5)))
+        self.assertIsNone(intersection((3, 4), (0, 0, 4.5)))
+        self.assertEqual((3, 4), intersection((0, 0, 4.5), (3, 4), tol=.6))
+        self.assertIsNone(intersection((3, 4), (0, 0, 1), tol=-2))
+
+    def test_circles(self):
+        """Two circles intersect like with circle_intersect."""
+        self.assertEqual(((1, 0), ), intersection((0, 0, 1), (2, 0, 1)))
+        self.assertIsNone(intersection((0, 0, 1, 2), (0, 0)))
+
 
 def circle_line_intersection_data(mode):
     """
@@ -108,6 +207,114 @@ class TestCircleLineIntersection(unittest.TestCase):
             2, len(intersection), f'Intersection: {intersection}:'
         )
 
+    def test_general_line(self):
+        """Intersections with an oblique line, the lowest one first."""
+        # Line y = x - 2 and circle of center (1, -1)
+        intersection = circle_line_intersection((1, -1, 2), (1, -1, -2))
+        np.testing.assert_allclose(
+            ((1 - np.sqrt(2), -1 - np.sqrt(2)), (1 + np.sqrt(2), -1 + np.sqrt(2))), intersection
+        )
+
+    def test_vertical_line(self):
+        """Intersections with a vertical line (b == 0), the lowest one first."""
+        intersection = circle_line_intersection((1, -1, 2), (1, 0, -2))
+        np.testing.assert_allclose(((2, -1 - np.sqrt(3)), (2, -1 + np.sqrt(3))), intersection)
+
+    def test_horizontal_line(self):
+        """Intersections with a horizontal line (a == 0), the leftmost one first."""
+        intersection = circle_line_intersection((1, -1, 2), (0, 1, 0))
+        np.testing.assert_allclose(((1 - np.sqrt(3), 0), (1 + np.sqrt(3), 0)), intersection)
+
+    def test_exact_tangent(self):
+        """A line tangent to the circle gives a single point."""
+        self.assertEqual(((1, 1), ), circle_line_intersection((1, -1, 2), (0, 1, -1)))
+        self.assertEqual(((3, -1), ), circle_line_intersection((1, -1, 2), (-1, 0, 3)))
+
+    def test_no_intersection(self):
+        """A line far from the circle does not intersect it."""
+        self.assertEqual((), circle_line_intersection((1, -1, 2), (0, 1, -2)))
+        self.assertEqual((), circle_line_intersection((1, -1, 2), (1, 1, -5)))
+
+    def test_batch(self):
+        """Batch intersections should match circle_line_from_points_intersection."""
+        circles = np.random.rand(200, 3) * 4
+        first_points, second_points = np.random.rand(2, 200, 2) * 4
+        # Tangent line
+        circles[0], first_points[0], second_points[0] = (0, 0, 1), (-1, 1), (1, 1)
+        counts, intersections = circle_line_from_points_intersection_batch(
+            circles, first_points, second_points
+        )
+        for circle, first, second, count, points in zip(
+                circles, first_points, second_points, counts, intersections
+        ):
+            inter = circle_line_from_points_intersection(tuple(circle), tuple(first), tuple(second))
+            self.assertEqual(len(inter), count)
+            if count:
+                np.testing.assert_allclose(points[:count], inter)
+            else:
+                self.assertTrue(np.isnan(points).all())
+        self.assertEqual(1, counts[0])
+
+
+class TestPairwiseDistances(unittest.TestCase):
+    """Test the distances between two sets of points."""
+
+    def test_pairwise(self):
+        """Each distance matches sqr_dist."""
+        points1, points2 = np.random.rand(5, 2) * 4, np.random.rand(7, 2) * 4
+        distances = pairwise_sqr_dist(points1, points2)
+        self.assertEqual((5, 7), distances.shape)
+        for i, point1 in enumerate(points1):
+            for j, point2 in enumerate(points2):
+                self.assertAlmostEqual(sqr_dist(point1, point2), distances[i, j])
+        self.assertAlmostEqual(0, pairwise_sqr_dist(points1, points1).diagonal().max())
+
+    def test_batch(self):
+        """Distances between points of the same index match sqr_dist."""
+        points1, points2 = np.random.rand(2, 9, 2) * 4
+        out = np.empty(9)
+        self.assertIs(out, sqr_dist_batch(points1, points2, out=out))
+        for point1, point2, distance in zip(points1, points2, out):
+            self.assertAlmostEqual(sqr_dist(point1, point2), distance)
+
+
+class TestDeprecated(unittest.TestCase):
+    """Test the deprecated names of the geometry module."""
+
+    def test_core_dist(self):
+        """geometry.core.dist is math.dist, with a warning."""
+        import math
+        from pylinkage.geometry import core
+        with self.assertWarns(DeprecationWarning):
+            self.assertIs(math.dist, core.dist)
+        with self.assertRaises(AttributeError):
+            core.not_a_feature
+
+
+class TestCylToCart(unittest.TestCase):
+    """Test the conversion from polar to cartesian coordinates."""
+
+    def test_origin(self):
+        """The default origin gives the same result as the specialized function."""
+        for theta in np.linspace(-4, 4, 9):
+            self.assertEqual(cyl_to_cart_origin(2, theta), cyl_to_cart(2, theta))
+            self.assertEqual(cyl_to_cart(2, theta), cyl_to_cart(2, theta, (0, 0)))
+
+    def test_offset(self):
+        """The origin is added to the coordinates."""
+        x, y = cyl_to_cart(2, np.pi / 2, (1, 3))
+        self.assertAlmostEqual(1, x)
+        self.assertAlmostEqual(5, y)
+
+    def test_batch(self):
+        """The batch version matches the scalar one."""
+        radii, thetas = np.linspace(1, 3, 7), np.linspace(-3, 3, 7)
+        x, y = batch_cyl_to_cart(radii, thetas, 1., -2.)
+        for i, (radius, theta) in enumerate(zip(radii, thetas)):
+            expected = cyl_to_cart(radius, theta, (1., -2.))
+            self.assertAlmostEqual(expected[0], x[i])
+            self.assertAlmostEqual(expected[1], y[i])
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -2,7 +2,9 @@
 Test cases for a Linkage.
 """
 import unittest
+import numpy as np
 import pylinkage as pl
+from pylinkage.geometry.secants import bounding_box as geometry_bounding_box
 
 
 class TestLinkage(unittest.TestCase):
@@ -33,6 +35,176 @@ class TestLinkage(unittest.TestCase):
         )
         self.assertTupleEqual((self.crank, self.pin), my_linkage.joints)
 
+    def test_step_batch(self):
+        """A batch simulation should match successive simulations."""
+        my_linkage = pl.Linkage(
+            joints=[self.crank, self.pin],
+            order=[self.crank, self.pin],
+        )
+        positions = my_linkage.get_coords()
+        constraints = np.array(my_linkage.get_num_constraints())
+        # Second set is not buildable
+        batch = np.array([constraints, constraints * (1, 1, 10)])
+        loci = my_linkage.step_batch(batch, positions, iterations=20)
+        self.assertTupleEqual((20, 2, 2, 2), loci.shape)
+        reference = tuple(my_linkage.step(iterations=20))
+        np.testing.assert_allclose(reference, loci[:, 0])
+        self.assertTrue(np.isnan(loci[:, 1, 1]).all())
+
+    def test_step_batch_joints(self):
+        """Recording some joints should not change their coordinates."""
+        my_linkage = pl.Linkage(joints=[self.crank, self.pin], order=[self.crank, self.pin])
+        constraints = np.array([my_linkage.get_num_constraints()])
+        loci = my_linkage.step_batch(constraints, iterations=20)
+        np.testing.assert_array_equal(
+            loci[:, :, [1]], my_linkage.step_batch(constraints, iterations=20, joints=[1])
+        )
+
+    def test_step_batch_float32(self):
+        """A single precision batch should stay close to double precision."""
+        my_linkage = pl.Linkage(
+            joints=[self.crank, self.pin],
+            order=[self.crank, self.pin],
+        )
+        constraints = np.array([my_linkage.get_num_constraints()])
+        loci = my_linkage.step_batch(constraints, iterations=20, dtype=np.float32)
+        self.assertEqual(np.float32, loci.dtype)
+        np.testing.assert_allclose(
+            my_linkage.step_batch(constraints, iterations=20), loci, atol=1e-4
+        )
+
+    def test_step_array(self):
+        """Coordinates written in an array should match the step generator."""
+        my_linkage = pl.Linkage(
+            joints=[self.crank, self.pin],
+            order=[self.crank, self.pin],
+        )
+        positions = my_linkage.get_coords()
+        reference = tuple(my_linkage.step(iterations=20))
+        my_linkage.set_coords(positions)
+        out = np.empty((20, 2, 2))
+        loci = my_linkage.step_array(out=out)
+        self.assertIs(out, loci)
+        np.testing.assert_allclose(reference, loci)
+
+    def test_set_num_constraints(self):
+        """Flat constraints should be dispatched to every joint, Linear included."""
+        slider = pl.Linear(
+            joint0=self.crank, joint1=(0, -2), joint2=(1, -2), revolute_radius=4
+        )
+        my_linkage = pl.Linkage(joints=[self.crank, self.pin, slider])
+        my_linkage.set_num_constraints(np.array([2., 4., 3., 5.]))
+        self.assertListEqual([2, 4, 3, 5], my_linkage.get_num_constraints())
+
+    def test_set_coords(self):
+        """Coordinates can be set from an array."""
+        my_linkage = pl.Linkage(joints=[self.crank, self.pin])
+        my_linkage.set_coords(np.array([[1., 2.], [3., 4.]]))
+        self.assertListEqual([(1, 2), (3, 4)], my_linkage.get_coords())
+        self.assertIsInstance(self.pin.x, float)
+        # Any iterable, and fewer coordinates than joints
+        my_linkage.set_coords(iter([(5, 6), (7, 8)]))
+        self.assertListEqual([(5, 6), (7, 8)], my_linkage.get_coords())
+        my_linkage.set_coords([(0, 1)])
+        self.assertListEqual([(0, 1), (7, 8)], my_linkage.get_coords())
+
+    def test_compile(self):
+        """A compiled linkage should give exactly the same loci."""
+        slider = pl.Linear(
+            joint0=self.crank, joint1=(0, -2), joint2=(1, -2), revolute_radius=4
+        )
+        my_linkage = pl.Linkage(
+            joints=[self.crank, self.pin, slider],
+            order=[self.crank, self.pin, slider],
+        )
+        positions = my_linkage.get_coords()
+        reference = my_linkage.step_array(iterations=30, dt=.5)
+        self.assertTrue(my_linkage.compile())
+        my_linkage.set_coords(positions)
+        np.testing.assert_array_equal(reference, my_linkage.step_array(iterations=30, dt=.5))
+        self.assertListEqual(list(map(tuple, reference[-1])), my_linkage.get_coords())
+
+    def test_step_array_joints(self):
+        """Recording some joints should give the same coordinates for them."""
+        my_linkage = pl.Linkage(joints=[self.crank, self.pin], order=[self.crank, self.pin])
+        positions = my_linkage.get_coords()
+        reference = my_linkage.step_array(iterations=10)
+        for compiled in (False, True):
+            if compiled:
+                my_linkage.compile()
+            my_linkage.set_coords(positions)
+            np.testing.assert_array_equal(
+                reference[:, [1]], my_linkage.step_array(iterations=10, joints=[1])
+            )
+
+    def test_compile_static_fixed(self):
+        """A fixed joint on joints that never move should be placed like the others."""
+        frame = pl.Fixed(0, 0, joint0=(0, 0), joint1=(1, 0), distance=3, angle=.2, name="F")
+        pin = pl.Revolute(joint0=self.crank, joint1=frame, distance0=3, distance1=1)
+        my_linkage = pl.Linkage(joints=[frame, self.crank, pin], order=[frame, self.crank, pin])
+        positions = my_linkage.get_coords()
+        reference = my_linkage.step_array(iterations=30, dt=.5)
+        self.assertTrue(my_linkage.compile())
+        my_linkage.set_coords(positions)
+        np.testing.assert_array_equal(reference, my_linkage.step_array(iterations=30, dt=.5))
+
+    def test_compile_constraints(self):
+        """Constraints should be set the same way on a compiled linkage."""
+        frame = pl.Fixed(0, 0, joint0=(0, 0), joint1=(1, 0), distance=3, angle=.2, name="F")
+        pin = pl.Revolute(joint0=self.crank, joint1=frame, distance0=3, distance1=1)
+        my_linkage = pl.Linkage(joints=[frame, self.crank, pin], order=[frame, self.crank, pin])
+        self.assertTrue(my_linkage.compile())
+        my_linkage.set_num_constraints(np.array([2, .5, 1.5, 0, 4]))
+        self.assertEqual([2, .5, 1.5, 3, 4], my_linkage.get_num_constraints())
+        # Shorter constraints are still accepted
+        my_linkage.set_num_constraints([5, .1])
+        self.assertEqual([5, .1, 1.5, 3, 4], my_linkage.get_num_constraints())
+
+    def test_compile_unbuildable(self):
+        """A compiled linkage should raise an error when it cannot be built."""
+        my_linkage = pl.Linkage(
+            joints=[self.crank, self.pin],
+            order=[self.crank, self.pin],
+        )
+        my_linkage.compile()
+        my_linkage.set_num_constraints([1, 3, 10])
+        with self.assertRaises(pl.UnbuildableError):
+            my_linkage.step_array(iterations=20)
+
+    def test_rotation_period(self):
+        """The rotation period should follow the crank angle."""
+        my_linkage = pl.Linkage(joints=[self.crank, self.pin])
+        self.assertEqual(20, my_linkage.get_rotation_period())
+        self.crank.angle = 0.1
+        self.assertEqual(63, my_linkage.get_rotation_period())
+
+
+class TestBoundingBox(unittest.TestCase):
+    """Test cases for the bounding box of a locus."""
+
+    def test_array_locus(self):
+        """An array locus should give the same result as a tuple locus."""
+        locus = np.random.rand(20, 2) * 10 - 5
+        self.assertTupleEqual(
+            tuple(pl.bounding_box(tuple(map(tuple, locus)))),
+            tuple(pl.bounding_box(locus))
+        )
+
+    def test_batch_loci(self):
+        """A batch of loci should give the bounding box of each locus."""
+        loci = np.random.rand(3, 20, 2)
+        batch = np.transpose(pl.bounding_box(loci))
+        for locus, bb in zip(loci, batch):
+            self.assertTupleEqual(tuple(pl.bounding_box(locus)), tuple(bb))
+
+    def test_geometry_bounding_box(self):
+        """The geometry version gives the same result for tuple and array loci."""
+        locus = np.random.rand(20, 2) * 10 - 5
+        self.assertTupleEqual(
+            geometry_bounding_box(tuple(map(tuple, locus))),
+            tuple(map(float, geometry_bounding_box(locus)))
+        )
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -17,6 +17,10 @@ class TestAgent(unittest.TestCase):
         for i, val in enumerate([dimensions, init_positions]):
             self.assertTupleEqual(tuple(val), tuple(agent[i + 1]))
 
+    def test_no_instance_dict(self):
+        """Agents should not carry an instance dictionary."""
+        self.assertFalse(hasattr(Agent(0, (), ()), "__dict__"))
+
 
 class TestMutableAgent(unittest.TestCase):
     """Test a Mutable agent object."""
@@ -44,6 +48,13 @@ class TestMutableAgent(unittest.TestCase):
         for i, val in enumerate([dimensions, init_positions]):
             self.assertTupleEqual(tuple(val), tuple(agent[i + 1]))
 
+    def test_no_instance_dict(self):
+        """Mutable agents should only store their three fields."""
+        agent = MutableAgent()
+        self.assertFalse(hasattr(agent, "__dict__"))
+        with self.assertRaises(AttributeError):
+            agent.other = 0
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -41,6 +41,18 @@ def fitness_func(loci, **kwargs):
     return (tip_locus[0] - 3) ** 2 + tip_locus[1] ** 2
 
 
+def vectorized_fitness_func(linkage, dims, pos):
+    """Score a slice of the swarm, a slice should never be empty.
+
+    :param linkage: Linkage to evaluate.
+    :param dims: Dimensions of each particle of the slice.
+    :param pos: Initial positions of the joints.
+    """
+    if len(dims) == 0:
+        raise ValueError("Empty slice of particles")
+    return np.array([fitness_func(linkage, d, pos) for d in dims])
+
+
 class TestGenerateBounds(unittest.TestCase):
     """Test various things about the generate_bounds function."""
 
@@ -99,6 +111,25 @@ class TestTrialsAndErrors(unittest.TestCase):
         )[0]
         self.assertAlmostEqual(0.0, score, delta=0.3)
 
+    def test_multiprocessing(self):
+        """Results with several processes should be the same as with one."""
+        bounds = optimization.generate_bounds(self.linkage.get_num_constraints(), 2, 2)
+        results = [
+            optimization.trials_and_errors_optimization(
+                eval_func=fitness_func,
+                linkage=self.linkage,
+                divisions=5,
+                bounds=bounds,
+                order_relation=min,
+                verbose=False,
+                n_processes=n_processes,
+            )
+            for n_processes in (None, 2)
+        ]
+        for serial, parallel in zip(*results):
+            self.assertEqual(serial.score, parallel.score)
+            np.testing.assert_array_equal(serial.dimensions, parallel.dimensions)
+
 
 class TestPSO(unittest.TestCase):
     """Test the particle swarm optimization."""
@@ -130,6 +161,77 @@ class TestPSO(unittest.TestCase):
         # Do not apply optimization problems
         self.assertAlmostEqual(0.0, score, delta=delta)
 
+    def test_vectorized(self):
+        """Test if the whole swarm can be evaluated in one call."""
+        dim = len(self.constraints)
+
+        def eval_func(linkage, dims, pos):
+            return np.array([fitness_func(linkage, d, pos) for d in dims])
+
+        score, dimensions, coord = optimization.particle_swarm_optimization(
+            eval_func=eval_func,
+            linkage=self.linkage,
+            bounds=(np.zeros(dim), np.ones(dim) * 5),
+            n_particles=20,
+            iters=5,
+            order_relation=min,
+            verbose=False,
+            vectorized=True,
+        )[0]
+        self.assertEqual(dim, len(dimensions))
+        self.assertGreaterEqual(score, 0)
+
+    def test_vectorized_few_particles(self):
+        """Test a vectorized evaluation with more processes than particles."""
+        dim = len(self.constraints)
+        score, dimensions, coord = optimization.particle_swarm_optimization(
+            eval_func=vectorized_fitness_func,
+            linkage=self.linkage,
+            bounds=(np.zeros(dim), np.ones(dim) * 5),
+            n_particles=2,
+            iters=3,
+            order_relation=min,
+            verbose=False,
+            n_processes=3,
+            vectorized=True,
+        )[0]
+        self.assertEqual(dim, len(dimensions))
+        self.assertGreaterEqual(score, 0)
+
+    def test_multiprocessing(self):
+        """Test if particles can be evaluated in several processes."""
+        dim = len(self.constraints)
+        score, dimensions, coord = optimization.particle_swarm_optimization(
+            eval_func=fitness_func,
+            linkage=self.linkage,
+            bounds=(np.zeros(dim), np.ones(dim) * 5),
+            n_particles=20,
+            iters=5,
+            order_relation=min,
+            verbose=False,
+            n_processes=2,
+        )[0]
+        self.assertEqual(dim, len(dimensions))
+        self.assertGreaterEqual(score, 0)
+
+    def test_asynchronous(self):
+        """Test if particles can move as soon as they are evaluated."""
+        dim = len(self.constraints)
+        for n_processes in (None, 2):
+            score, dimensions, coord = optimization.particle_swarm_optimization(
+                eval_func=fitness_func,
+                linkage=self.linkage,
+                bounds=(np.zeros(dim), np.ones(dim) * 5),
+                n_particles=20,
+                iters=5,
+                order_relation=min,
+                verbose=False,
+                n_processes=n_processes,
+                asynchronous=True,
+            )[0]
+            self.assertEqual(dim, len(dimensions))
+            self.assertGreaterEqual(score, 0)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests for the top-level package.
+"""
+
+import subprocess
+import sys
+import unittest
+
+import pylinkage as pl
+
+
+class TestPackage(unittest.TestCase):
+    """Test the package exports."""
+
+    def test_lazy_visualizer(self):
+        """Importing pylinkage should not import matplotlib."""
+        code = "import sys, pylinkage; print('matplotlib' in sys.modules)"
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+        self.assertEqual("False", result.stdout.strip())
+
+    def test_visualizer_exports(self):
+        """Visualization features are still available from the package."""
+        from pylinkage.visualizer import show_linkage
+        self.assertIs(show_linkage, pl.show_linkage)
+        self.assertIn("swarm_tiled_repr", dir(pl))
+        with self.assertRaises(AttributeError):
+            pl.not_a_feature
+
+
+if __name__ == '__main__':
+    unittest.main()